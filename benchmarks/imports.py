@@ -0,0 +1,136 @@
+"""Import time of shuffler modules, each measured in a fresh interpreter.
+
+Usage:
+    python -m benchmarks.imports --output results.json
+    python -m benchmarks.imports --compare results.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+MODULES = [
+    "shuffler",
+    "shuffler.strategies",
+    "shuffler.shufflers.threading",
+    "shuffler.shufflers.asyncio",
+    "shuffler.plugins.eventloop",
+    "shuffler.plugins.sqlalchemy",
+    "shuffler.pytest_plugin",
+]
+# Heavy optional dependencies that shouldn't be imported unless used
+HEAVY = ["sqlalchemy", "asyncpg"]
+
+SCRIPT = """
+import json, sys, time
+started_at = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started_at
+json.dump({{"elapsed": elapsed, "modules": sorted(sys.modules)}}, sys.stdout)
+"""
+
+
+@dataclass
+class Result:
+    module: str
+    runs: int
+    median_ms: float
+    min_ms: float
+    n_modules: int
+    heavy: list[str]
+
+
+def measure(module: str, runs: int) -> Result:
+    timings = []
+    modules: list[str] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(module=module)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        report = json.loads(output)
+        timings.append(report["elapsed"] * 1000)
+        modules = report["modules"]
+
+    return Result(
+        module=module,
+        runs=runs,
+        median_ms=statistics.median(timings),
+        min_ms=min(timings),
+        n_modules=len(modules),
+        heavy=[name for name in HEAVY if name in modules],
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", type=Path, help="Write results to a JSON file")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative import time increase reported as a regression",
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare is not None:
+        baseline = {
+            result["module"]: Result(**result)
+            for result in json.loads(args.compare.read_text())["results"]
+        }
+
+    results = []
+    regressions = []
+    for module in args.modules:
+        try:
+            result = measure(module, args.runs)
+        except subprocess.CalledProcessError as err:
+            reason = err.stderr.strip().splitlines()[-1]
+            sys.stderr.write(f"{module}: skipped ({reason})\n")
+            continue
+
+        results.append(result)
+        sys.stderr.write(
+            f"{module:>30} {result.median_ms:>8.1f} ms (min {result.min_ms:.1f}) "
+            f"{result.n_modules:>4} modules"
+            f"{' heavy: ' + ', '.join(result.heavy) if result.heavy else ''}\n"
+        )
+        old = baseline.get(module)
+        if old is not None and result.median_ms > old.median_ms * (1 + args.threshold):
+            regressions.append(
+                f"{module}: {old.median_ms:.1f} -> {result.median_ms:.1f} ms"
+            )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(tz=UTC).isoformat(),
+            "python": sys.version,
+            "platform": platform.platform(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    for line in regressions:
+        sys.stderr.write(f"REGRESSION {line}\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+"""Per-step scheduling overhead of shufflers, plugins and strategies.
+
+Usage:
+    python -m benchmarks.overhead --output results.json
+    python -m benchmarks.overhead --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from functools import partial
+from multiprocessing.synchronize import Barrier as BarrierType
+from multiprocessing.synchronize import Event as EventType
+from pathlib import Path
+from typing import Any, Callable, TypeAlias
+
+from shuffler.plugins.eventloop import EventLoopPlugin
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.shufflers.process import ProcessShuffler
+from shuffler.shufflers.threading import ThreadingShuffler
+from shuffler.strategies import (
+    ExhaustiveStrategy,
+    Interner,
+    RandomStrategy,
+    Strategy,
+)
+
+# (strategy, pool_size, ops_per_task, max_iterations) -> (iterations, steps)
+Runner: TypeAlias = Callable[[Strategy[Any], int, int, int], tuple[int, int]]
+StrategyFactory: TypeAlias = Callable[[int], Strategy[Any]]
+
+
+class Skipped(Exception):
+    pass
+
+
+def run_strategy(
+    strategy: Strategy[Any],
+    pool_size: int,
+    n_ops: int,
+    max_iterations: int,
+) -> tuple[int, int]:
+    interner: Interner[str] = Interner()
+    bits = [interner.bit(f"Task-{ix}") for ix in range(pool_size)]
+
+    iterations = steps = 0
+    while not strategy.is_completed() and iterations < max_iterations:
+        remaining = [n_ops] * pool_size
+        pending = sum(bits)
+        while pending:
+            ix = strategy.choose_next_mask(pending, interner)
+            remaining[ix] -= 1
+            if not remaining[ix]:
+                pending ^= bits[ix]
+
+        steps += len(strategy.finish_sequence())
+        iterations += 1
+
+    return iterations, steps
+
+
+def run_threading(
+    strategy: Strategy[Any],
+    pool_size: int,
+    n_ops: int,
+    max_iterations: int,
+) -> tuple[int, int]:
+    shuffler = ThreadingShuffler(pool_size=pool_size, strategy=strategy)
+
+    def task(task_id: str) -> None:
+        for _ in range(n_ops):
+            with shuffler.shuffle(task_id):
+                pass
+        shuffler.decrement_pool_size()
+
+    iterations = steps = 0
+    with ThreadPoolExecutor(max_workers=pool_size) as pool:
+        while not shuffler.strategy_completed() and iterations < max_iterations:
+            futures = [pool.submit(task, f"Task-{ix}") for ix in range(pool_size)]
+            for future in futures:
+                future.result()
+
+            steps += len(shuffler.finish_sequence())
+            iterations += 1
+
+    return iterations, steps
+
+
+def run_asyncio(
+    strategy: Strategy[Any],
+    pool_size: int,
+    n_ops: int,
+    max_iterations: int,
+) -> tuple[int, int]:
+    async def main() -> tuple[int, int]:
+        shuffler = AsyncioShuffler(pool_size=pool_size, strategy=strategy)
+
+        async def task(task_id: str) -> None:
+            for _ in range(n_ops):
+                async with shuffler.shuffle(task_id):
+                    pass
+            shuffler.decrement_pool_size()
+
+        iterations = steps = 0
+        while not shuffler.strategy_completed() and iterations < max_iterations:
+            await asyncio.gather(*(task(f"Task-{ix}") for ix in range(pool_size)))
+            steps += len(shuffler.finish_sequence())
+            iterations += 1
+
+        return iterations, steps
+
+    return asyncio.run(main())
+
+
+def _process_task(shuffler: ProcessShuffler, task_id: str, n_ops: int) -> None:
+    for _ in range(n_ops):
+        with shuffler.shuffle(task_id):
+            pass
+    shuffler.decrement_pool_size()
+
+
+def _process_worker(
+    shuffler: ProcessShuffler,
+    task_id: str,
+    n_ops: int,
+    barrier: BarrierType,
+    stop: EventType,
+) -> None:
+    while True:
+        barrier.wait()
+        if stop.is_set():
+            return
+        _process_task(shuffler, task_id, n_ops)
+        barrier.wait()
+
+
+def run_process(
+    strategy: Strategy[Any],
+    pool_size: int,
+    n_ops: int,
+    max_iterations: int,
+) -> tuple[int, int]:
+    ctx = multiprocessing.get_context("fork")
+    # Workers are forked once and run every iteration, so that forks aren't
+    # counted as per-step overhead, like thread pools of the threading runner
+    barrier, stop = ctx.Barrier(pool_size + 1), ctx.Event()
+    iterations = steps = 0
+    with ProcessShuffler(pool_size=pool_size, strategy=strategy) as shuffler:
+        processes = [
+            ctx.Process(
+                target=_process_worker,
+                args=(shuffler, f"Task-{ix}", n_ops, barrier, stop),
+            )
+            for ix in range(pool_size)
+        ]
+        with warnings.catch_warnings():
+            # The coordinator thread is running while workers are forked
+            warnings.filterwarnings("ignore", "This process .* is multi-threaded")
+            for process in processes:
+                process.start()
+
+        try:
+            while not shuffler.strategy_completed() and iterations < max_iterations:
+                # Iterations start and end together, the shuffler can't tell
+                # workers that haven't connected yet from dead ones
+                barrier.wait()
+                barrier.wait()
+                steps += len(shuffler.finish_sequence())
+                iterations += 1
+        finally:
+            stop.set()
+            barrier.wait()
+            for process in processes:
+                process.join()
+
+    return iterations, steps
+
+
+def run_eventloop(
+    strategy: Strategy[Any],
+    pool_size: int,
+    n_ops: int,
+    max_iterations: int,
+) -> tuple[int, int]:
+    plugin = EventLoopPlugin(strategy=strategy)
+    loop = plugin.new_event_loop()
+
+    async def task() -> None:
+        for _ in range(n_ops):
+            await asyncio.sleep(0)
+
+    async def main() -> None:
+        await asyncio.gather(*(task() for _ in range(pool_size)))
+
+    iterations = steps = 0
+    try:
+        while not plugin.strategy_completed() and iterations < max_iterations:
+            with plugin.activate():
+                loop.run_until_complete(main())
+
+            steps += len(plugin.finish_sequence())
+            iterations += 1
+    finally:
+        loop.close()
+
+    return iterations, steps
+
+
+def run_sqlalchemy(
+    strategy: Strategy[Any],
+    pool_size: int,
+    n_ops: int,
+    max_iterations: int,
+) -> tuple[int, int]:
+    try:
+        import aiosqlite  # noqa: F401
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+        from shuffler.plugins.sqlalchemy import AlchemyPlugin
+    except ImportError as err:
+        raise Skipped(str(err)) from err
+
+    async def task(engine: AsyncEngine) -> None:
+        async with engine.connect() as conn:
+            for _ in range(n_ops):
+                await conn.execute(text("SELECT 1"))
+
+    async def main(path: Path) -> tuple[int, int]:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        plugin = AlchemyPlugin(engine=engine, strategy=strategy)
+        operations = [partial(task, engine) for _ in range(pool_size)]
+        # Dialect initialization queries run on the first connect only
+        await asyncio.gather(*(operation() for operation in operations))
+
+        iterations = steps = 0
+        try:
+            with plugin:
+                while not plugin.strategy_completed() and iterations < max_iterations:
+                    steps += len(await plugin.run_single_pass(*operations))
+                    iterations += 1
+        finally:
+            await engine.dispose()
+
+        return iterations, steps
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        return asyncio.run(main(Path(tmpdir) / "bench.db"))
+
+
+def random_strategy(max_iterations: int) -> Strategy[Any]:
+    strategy: RandomStrategy[Any] = RandomStrategy(max_iterations=max_iterations)
+    strategy.seed(0)
+    return strategy
+
+
+RUNNERS: dict[str, Runner] = {
+    "strategy": run_strategy,
+    "threading": run_threading,
+    "asyncio": run_asyncio,
+    "process": run_process,
+    "eventloop": run_eventloop,
+    "sqlalchemy": run_sqlalchemy,
+}
+
+STRATEGIES: dict[str, StrategyFactory] = {
+    "exhaustive": lambda _: ExhaustiveStrategy(),
+    "random": random_strategy,
+}
+
+
+@dataclass
+class Result:
+    shuffler: str
+    strategy: str
+    pool_size: int
+    ops_per_task: int
+    iterations: int
+    steps: int
+    elapsed: float
+    steps_per_sec: float
+    iterations_per_sec: float
+    us_per_step: float
+    peak_memory: int
+
+    @property
+    def key(self) -> tuple[str, str, int, int]:
+        return self.shuffler, self.strategy, self.pool_size, self.ops_per_task
+
+
+def measure(
+    shuffler: str,
+    strategy: str,
+    pool_size: int,
+    n_ops: int,
+    max_iterations: int,
+) -> Result:
+    runner, strategy_factory = RUNNERS[shuffler], STRATEGIES[strategy]
+
+    started_at = time.perf_counter()
+    iterations, steps = runner(
+        strategy_factory(max_iterations), pool_size, n_ops, max_iterations
+    )
+    elapsed = time.perf_counter() - started_at
+
+    # Separate pass: tracemalloc slows down allocations considerably
+    tracemalloc.start()
+    try:
+        runner(strategy_factory(max_iterations), pool_size, n_ops, max_iterations)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        shuffler=shuffler,
+        strategy=strategy,
+        pool_size=pool_size,
+        ops_per_task=n_ops,
+        iterations=iterations,
+        steps=steps,
+        elapsed=elapsed,
+        steps_per_sec=steps / elapsed,
+        iterations_per_sec=iterations / elapsed,
+        us_per_step=elapsed / steps * 1e6,
+        peak_memory=peak_memory,
+    )
+
+
+def compare(
+    results: list[Result],
+    baseline: list[Result],
+    threshold: float,
+) -> list[str]:
+    by_key = {result.key: result for result in baseline}
+    regressions = []
+    for result in results:
+        if (old := by_key.get(result.key)) is None:
+            continue
+
+        ratio = result.steps_per_sec / old.steps_per_sec
+        if ratio < 1 - threshold:
+            regressions.append(
+                f"{'/'.join(map(str, result.key))}: "
+                f"{old.steps_per_sec:.0f} -> {result.steps_per_sec:.0f} steps/sec "
+                f"({ratio - 1:+.0%})"
+            )
+
+    return regressions
+
+
+def parse_ints(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shufflers", nargs="+", choices=RUNNERS, default=[*RUNNERS])
+    parser.add_argument(
+        "--strategies", nargs="+", choices=STRATEGIES, default=[*STRATEGIES]
+    )
+    parser.add_argument("--pool-sizes", type=parse_ints, default=[2, 3, 4])
+    parser.add_argument("--ops", type=parse_ints, default=[1, 2, 4])
+    parser.add_argument("--max-iterations", type=int, default=200)
+    parser.add_argument("--output", type=Path, help="Write results to a JSON file")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative steps/sec drop reported as a regression",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare is not None:
+        baseline = [
+            Result(**result)
+            for result in json.loads(args.compare.read_text())["results"]
+        ]
+
+    results = []
+    for shuffler in args.shufflers:
+        # An unavailable runner is skipped as a whole, not per configuration
+        try:
+            for strategy in args.strategies:
+                for pool_size in args.pool_sizes:
+                    for n_ops in args.ops:
+                        result = measure(
+                            shuffler, strategy, pool_size, n_ops, args.max_iterations
+                        )
+                        results.append(result)
+                        sys.stderr.write(
+                            f"{shuffler:>10} {strategy:>10} "
+                            f"pool={pool_size} ops={n_ops} "
+                            f"{result.steps_per_sec:>10.0f} steps/s "
+                            f"{result.iterations_per_sec:>9.0f} it/s "
+                            f"{result.us_per_step:>8.1f} us/step "
+                            f"{result.peak_memory / 1024:>8.1f} KiB\n"
+                        )
+        except Skipped as err:
+            sys.stderr.write(f"{shuffler}: skipped ({err})\n")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(tz=UTC).isoformat(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "max_iterations": args.max_iterations,
+        },
+        "results": [asdict(result) for result in results],
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            sys.stderr.write(f"REGRESSION {line}\n")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,15 @@
-from . import plugins, shufflers, strategies
+from typing import TYPE_CHECKING
+
+from .util import lazy_import
+
+if TYPE_CHECKING:
+    from . import plugins, primitives, shufflers, strategies
 
 __all__ = [
     "plugins",
+    "primitives",
     "shufflers",
     "strategies",
 ]
+
+__getattr__, __dir__ = lazy_import(__name__, submodules=__all__)
@@ -0,0 +1,163 @@
+"""
+Persistent record of explored schedules, shared between runs. An append-only
+JSON lines file holds, per test, hashes of explored schedules with their
+outcomes, hashes of their prefixes (up to `prefix_depth` steps), hashes of
+exhausted prefixes (all of whose schedules passed) and full sequences of
+failures, so that they can be replayed
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+# Hash of the empty prefix, the root of every schedule
+ROOT = b""
+
+
+class Outcome(StrEnum):
+    PASSED = "passed"
+    FAILED = "failed"
+
+
+def extend_hash(prefix_hash: bytes, step: Any) -> bytes:
+    """Hash of a prefix extended by `step`, steps must be JSON-serializable"""
+    return hashlib.blake2b(
+        prefix_hash + json.dumps(step).encode(), digest_size=8
+    ).digest()
+
+
+def prefix_hashes(sequence: Iterable[Any]) -> Iterator[bytes]:
+    prefix_hash = ROOT
+    for step in sequence:
+        prefix_hash = extend_hash(prefix_hash, step)
+        yield prefix_hash
+
+
+def schedule_hash(sequence: Iterable[Any]) -> bytes:
+    prefix_hash = ROOT
+    for step in sequence:
+        prefix_hash = extend_hash(prefix_hash, step)
+    return prefix_hash
+
+
+class Corpus:
+    def __init__(self, path: str | Path, key: str, prefix_depth: int = 32) -> None:
+        self.path = Path(path)
+        self.key = key
+        self.prefix_depth = prefix_depth
+
+        self.prefixes: set[bytes] = set()
+        # Prefixes all of whose schedules passed, including passed schedules
+        self.exhausted: set[bytes] = set()
+        # Children of prefixes seen by the current run, see `branch`
+        self._branches: dict[bytes, list[bytes]] = {}
+        self._outcomes: dict[bytes, Outcome] = {}
+        self._failures: dict[bytes, list[Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        self.prefixes.clear()
+        self.exhausted.clear()
+        self._outcomes.clear()
+        self._failures.clear()
+        if not self.path.exists():
+            return
+
+        with self.path.open() as file:
+            for line in file:
+                # A partially written line of a killed run
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record["key"] == self.key:
+                    self._apply(record)
+
+    def _apply(self, record: dict[str, Any]) -> None:
+        schedule = bytes.fromhex(record["schedule"])
+        outcome = Outcome(record["outcome"])
+        self._outcomes[schedule] = outcome
+        self.prefixes.update(map(bytes.fromhex, record.get("prefixes", ())))
+        self.exhausted.update(map(bytes.fromhex, record.get("exhausted", ())))
+
+        if outcome is Outcome.FAILED:
+            self._failures[schedule] = record["sequence"]
+            # E.g. after the code under test changed
+            self.exhausted.difference_update(prefix_hashes(record["sequence"]))
+            self.exhausted.discard(ROOT)
+        else:
+            self._failures.pop(schedule, None)
+
+    def __len__(self) -> int:
+        return len(self._outcomes)
+
+    def outcome(self, sequence: Sequence[Any]) -> Outcome | None:
+        return self._outcomes.get(schedule_hash(sequence))
+
+    def is_verified(self, sequence: Sequence[Any]) -> bool:
+        return self.outcome(sequence) is Outcome.PASSED
+
+    def failures(self) -> list[list[Any]]:
+        """Sequences that failed and haven't passed since"""
+        return list(self._failures.values())
+
+    def branch(self, prefix_hash: bytes, children: list[bytes]) -> None:
+        """
+        Notes the children (hashes of the prefix extended by each option) of a
+        prefix, so that it's marked as exhausted once all of them are
+        """
+        self._branches[prefix_hash] = children
+
+    def _newly_exhausted(self, hashes: list[bytes]) -> list[bytes]:
+        """The passed schedule of `hashes`, and its ancestors exhausted by it"""
+        exhausted = [hashes[-1] if hashes else ROOT]
+        for prefix in reversed([ROOT, *hashes][:-1]):
+            children = self._branches.get(prefix)
+            if children is None or not all(
+                child in self.exhausted or child == exhausted[-1] for child in children
+            ):
+                break
+            exhausted.append(prefix)
+        return [prefix for prefix in exhausted if prefix not in self.exhausted]
+
+    def record(self, sequence: Sequence[Any], passed: bool) -> None:
+        """
+        Appends the outcome of `sequence`. Unchanged outcomes of known schedules
+        aren't written again, nor are prefixes recorded already
+        """
+        hashes = list(prefix_hashes(sequence))
+        schedule = hashes[-1] if hashes else ROOT
+        outcome = Outcome.PASSED if passed else Outcome.FAILED
+        exhausted = self._newly_exhausted(hashes) if passed else []
+        if self._outcomes.get(schedule) is outcome and not exhausted:
+            return
+
+        record: dict[str, Any] = {
+            "key": self.key,
+            "schedule": schedule.hex(),
+            "outcome": outcome,
+            "prefixes": [
+                prefix.hex()
+                for prefix in hashes[: self.prefix_depth]
+                if prefix not in self.prefixes
+            ],
+        }
+        if exhausted:
+            record["exhausted"] = [prefix.hex() for prefix in exhausted]
+        if not passed:
+            record["sequence"] = list(sequence)
+        self._apply(record)
+
+        # Single `write` of an O_APPEND file, so that concurrent workers'
+        # records don't interleave
+        data = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
@@ -0,0 +1,189 @@
+"""
+Exhaustive exploration within a single run: instead of re-running setup and
+the shared prefix for every sequence, the process is forked at every branching
+point, one child per untried choice, so that each node of the exploration tree
+is executed once and copy-on-write keeps memory cheap.
+
+`fork` only copies the calling thread, so tasks are generators stepped in one
+thread, each `yield` being a scheduling point (like `shuffler.shuffle(...)`):
+
+    def transfer(db: Db, amount: int) -> Iterator[None]:
+        yield
+        balance = db.balance
+        yield
+        db.balance = balance - amount
+
+    db = expensive_setup()
+    result = ForkExplorer().explore(
+        {"A": transfer(db, 10), "B": transfer(db, 20)},
+        check=lambda: assert_balance(db),
+    )
+
+Code before the first `yield` of every task runs once before exploration
+"""
+
+from __future__ import annotations
+import json
+import mmap
+import os
+import struct
+import tempfile
+import traceback
+import warnings
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Mapping, NoReturn
+
+from shuffler.shufflers.protocol import TaskID
+
+# Shared between all processes of an exploration: number of forks, stop flag
+_SHARED = struct.Struct("QB")
+
+
+@dataclass
+class ForkFailure:
+    sequence: list[TaskID]
+    traceback: str
+
+
+@dataclass
+class ForkResult:
+    sequences: list[list[TaskID]] = field(default_factory=list)
+    failures: list[ForkFailure] = field(default_factory=list)
+    # Number of forked processes, i.e. tree nodes executed after branching
+    forks: int = 0
+
+
+class ForkExplorer:
+    def __init__(self, stop_on_failure: bool = True) -> None:
+        self.stop_on_failure = stop_on_failure
+
+    def explore(
+        self,
+        tasks: Mapping[TaskID, Iterator[Any]],
+        check: Callable[[], None] | None = None,
+    ) -> ForkResult:
+        """
+        Explores all interleavings of `tasks` and calls `check` at the end of
+        each of them. The calling process only collects results, `tasks` and
+        the state they share are left untouched
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("ForkExplorer requires os.fork")
+
+        shared = mmap.mmap(-1, _SHARED.size)
+        with tempfile.TemporaryFile() as results:
+            with warnings.catch_warnings():
+                # Other threads of the caller aren't used by the explorer
+                warnings.filterwarnings("ignore", "This process .* is multi-threaded")
+                pid = os.fork()
+
+            if pid == 0:
+                self._run(tasks, check, results.fileno(), shared)
+
+            _, status = os.waitpid(pid, 0)
+            results.seek(0)
+            result = ForkResult(forks=_SHARED.unpack_from(shared)[0])
+            for line in results:
+                record = json.loads(line)
+                result.sequences.append(record["sequence"])
+                if record["error"] is not None:
+                    result.failures.append(
+                        ForkFailure(record["sequence"], record["error"])
+                    )
+
+            if status and not result.failures:
+                result.failures.append(
+                    ForkFailure([], f"Explorer exited with status {status}")
+                )
+
+        shared.close()
+        return result
+
+    def _run(
+        self,
+        tasks: Mapping[TaskID, Iterator[Any]],
+        check: Callable[[], None] | None,
+        fd: int,
+        shared: mmap.mmap,
+    ) -> NoReturn:
+        # Forked children return from `_branch` and carry on from there,
+        # every process of the exploration ends up here
+        sequence: list[TaskID] = []
+        try:
+            runnable = {task_id: task for task_id, task in tasks.items() if _step(task)}
+            while runnable:
+                task_id = self._branch(sorted(runnable), sequence, fd, shared)
+                sequence.append(task_id)
+                if not _step(runnable[task_id]):
+                    del runnable[task_id]
+
+            if check is not None:
+                check()
+        except BaseException:
+            # Including `pytest.fail(...)` or `SystemExit`, a child has no
+            # caller to propagate them to
+            self._report(fd, shared, sequence, traceback.format_exc())
+        else:
+            self._report(fd, shared, sequence, None)
+        finally:
+            # Never return into the caller's code (e.g. pytest) in a child
+            os._exit(0)
+
+    def _branch(
+        self,
+        options: list[TaskID],
+        sequence: list[TaskID],
+        fd: int,
+        shared: mmap.mmap,
+    ) -> TaskID:
+        """
+        Forks a child per option but the last one, waiting for each of them,
+        then continues with the last one itself. Returns the option chosen in
+        the current process
+        """
+        for option in options[:-1]:
+            if _stopped(shared):
+                os._exit(0)
+
+            pid = os.fork()
+            if pid == 0:
+                forks, stop = _SHARED.unpack_from(shared)
+                _SHARED.pack_into(shared, 0, forks + 1, stop)
+                return option
+
+            _, status = os.waitpid(pid, 0)
+            if status:
+                self._report(
+                    fd, shared, [*sequence, option], f"Exited with status {status}"
+                )
+
+        if _stopped(shared):
+            os._exit(0)
+        return options[-1]
+
+    def _report(
+        self,
+        fd: int,
+        shared: mmap.mmap,
+        sequence: list[TaskID],
+        error: str | None,
+    ) -> None:
+        # Processes run one at a time, each writes its record at once
+        record = json.dumps({"sequence": sequence, "error": error}) + "\n"
+        os.write(fd, record.encode())
+        if error is not None and self.stop_on_failure:
+            forks, _ = _SHARED.unpack_from(shared)
+            _SHARED.pack_into(shared, 0, forks, 1)
+
+
+def _step(task: Iterator[Any]) -> bool:
+    """Runs a task up to its next scheduling point, False if it's finished"""
+    try:
+        next(task)
+    except StopIteration:
+        return False
+    return True
+
+
+def _stopped(shared: mmap.mmap) -> bool:
+    return bool(_SHARED.unpack_from(shared)[1])
@@ -0,0 +1,244 @@
+"""
+Recording of operation histories and checking them for linearizability against
+a sequential model, instead of hand-written invariants:
+
+    history = History(Counter())
+    shuffler = AsyncioShuffler(pool_size=2, strategy=..., history=history)
+
+    async def increment(key: str) -> None:
+        with history.operation(key, "increment") as call:
+            value = await get_value(key)
+            await set_value(key, value + 1)
+            call.output = value + 1
+
+    while not shuffler.strategy_completed():
+        await asyncio.gather(increment("a"), increment("a"))
+        history.check()
+        shuffler.finish_sequence()
+
+Histories are split by key (P-compositionality) and each part is checked with
+the Wing & Gong search, memoised on (set of linearized calls, model state) as
+proposed by Lowe
+"""
+
+from __future__ import annotations
+import itertools
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterator, Protocol
+
+from shuffler.shufflers.protocol import TaskID
+
+
+@dataclass
+class Call:
+    task_id: TaskID | None
+    key: Hashable
+    name: str
+    args: tuple[Any, ...]
+    # Logical timestamps of the invocation and of the response, if any
+    invoked: int
+    returned: int | None = None
+    output: Any = None
+
+    def __str__(self) -> str:
+        args = ", ".join(map(repr, self.args))
+        output = "<pending>" if self.returned is None else repr(self.output)
+        return f"{self.task_id}: {self.name}({args}) -> {output}"
+
+
+class Model(Protocol):
+    """Sequential specification of an object, states must be hashable"""
+
+    def initial(self) -> Hashable: ...
+
+    def step(self, state: Any, name: str, args: tuple[Any, ...]) -> tuple[Any, Any]:
+        """Returns the new state and the output of operation `name`"""
+        ...
+
+
+@dataclass(frozen=True)
+class Register(Model):
+    """Supports `read()`, `write(value)` and `cas(expected, value)`"""
+
+    initial_value: Hashable = None
+
+    def initial(self) -> Hashable:
+        return self.initial_value
+
+    def step(self, state: Any, name: str, args: tuple[Any, ...]) -> tuple[Any, Any]:
+        match name, args:
+            case "read", ():
+                return state, state
+            case "write", (value,):
+                return value, None
+            case "cas", (expected, value):
+                return (value, True) if state == expected else (state, False)
+            case _:
+                raise ValueError(f"Unknown operation {name}{args}")
+
+
+@dataclass(frozen=True)
+class Counter(Model):
+    """Supports `read()` and `increment(delta=1)` returning the new value"""
+
+    initial_value: int = 0
+
+    def initial(self) -> Hashable:
+        return self.initial_value
+
+    def step(self, state: Any, name: str, args: tuple[Any, ...]) -> tuple[Any, Any]:
+        match name, args:
+            case "read", ():
+                return state, state
+            case "increment", ():
+                return state + 1, state + 1
+            case "increment", (delta,):
+                return state + delta, state + delta
+            case _:
+                raise ValueError(f"Unknown operation {name}{args}")
+
+
+class LinearizabilityError(AssertionError):
+    def __init__(self, key: Hashable, calls: list[Call]) -> None:
+        self.key = key
+        self.calls = calls
+        history = "\n".join(f"  {call}" for call in calls)
+        super().__init__(f"History of {key!r} isn't linearizable:\n{history}")
+
+
+class History:
+    def __init__(
+        self,
+        model: Model,
+        current_task: Callable[[], TaskID | None] | None = None,
+    ) -> None:
+        self.model = model
+        self.calls: list[Call] = []
+        # Attributes calls to tasks, set by shufflers the history is passed to
+        self.current_task = current_task
+        self._clock = itertools.count()
+
+    def invoke(
+        self, key: Hashable, name: str, *args: Any, task_id: TaskID | None = None
+    ) -> Call:
+        if task_id is None and self.current_task is not None:
+            task_id = self.current_task()
+        call = Call(task_id, key, name, args, invoked=next(self._clock))
+        self.calls.append(call)
+        return call
+
+    def respond(self, call: Call, output: Any = None) -> None:
+        call.output = output
+        call.returned = next(self._clock)
+
+    @contextmanager
+    def operation(
+        self, key: Hashable, name: str, *args: Any, task_id: TaskID | None = None
+    ) -> Iterator[Call]:
+        """
+        Records the body as a call, its output is assigned to `call.output`.
+        A call that raised stays pending: it may or may not have taken effect
+        """
+        call = self.invoke(key, name, *args, task_id=task_id)
+        yield call
+        self.respond(call, call.output)
+
+    def clear(self) -> None:
+        self.calls = []
+
+    def check(self) -> None:
+        """Raises `LinearizabilityError` for the first key with a bad history"""
+        by_key: dict[Hashable, list[Call]] = {}
+        for call in self.calls:
+            by_key.setdefault(call.key, []).append(call)
+
+        for key, calls in by_key.items():
+            if not is_linearizable(calls, self.model):
+                raise LinearizabilityError(key, calls)
+
+
+def _entries(calls: list[Call]) -> tuple[list[int], list[int]]:
+    """
+    Invocations and responses in time order: index of the call for
+    invocations (-1 for responses) and position of the response of each entry
+    """
+    events = sorted(
+        [(call.invoked, ix, True) for ix, call in enumerate(calls)]
+        + [
+            (call.returned, ix, False)
+            for ix, call in enumerate(calls)
+            if call.returned is not None
+        ]
+    )
+    invocations = [ix if is_call else -1 for _, ix, is_call in events]
+    responses = [-1] * len(events)
+    positions = {}
+    for position, (_, ix, is_call) in enumerate(events):
+        if is_call:
+            positions[ix] = position
+        else:
+            responses[positions[ix]] = position
+    return invocations, responses
+
+
+def is_linearizable(calls: list[Call], model: Model) -> bool:
+    """
+    Whether there is an order of `calls` consistent with their real-time order
+    in which `model` produces their outputs. Pending calls may be left out
+    """
+    invocations, responses = _entries(calls)
+    # Entries form a doubly linked list with the sentinel head at `n`, so that
+    # linearized calls can be lifted out of it and restored on backtracking
+    n = len(invocations)
+    head = n
+    nxt = [*range(1, n), -1, 0]
+    prev = [n, *range(n - 1), -1]
+
+    def lift(entry: int) -> None:
+        nxt[prev[entry]] = nxt[entry]
+        if nxt[entry] != -1:
+            prev[nxt[entry]] = prev[entry]
+
+    def unlift(entry: int) -> None:
+        nxt[prev[entry]] = entry
+        if nxt[entry] != -1:
+            prev[nxt[entry]] = entry
+
+    state = model.initial()
+    linearized = 0
+    cache = {(linearized, state)}
+    stack: list[tuple[int, Any, int]] = []
+    remaining = n - len(calls)
+    entry = nxt[head]
+    while remaining:
+        ix = invocations[entry]
+        if ix == -1:
+            # A response of a call that couldn't be linearized before it
+            if not stack:
+                return False
+            entry, state, linearized = stack.pop()
+            if responses[entry] != -1:
+                unlift(responses[entry])
+                remaining += 1
+            unlift(entry)
+            entry = nxt[entry]
+            continue
+
+        call = calls[ix]
+        new_state, output = model.step(state, call.name, call.args)
+        if call.returned is None or output == call.output:
+            key = (linearized | 1 << ix, new_state)
+            if key not in cache:
+                cache.add(key)
+                stack.append((entry, state, linearized))
+                linearized, state = key
+                lift(entry)
+                if responses[entry] != -1:
+                    lift(responses[entry])
+                    remaining -= 1
+                entry = nxt[head]
+                continue
+        entry = nxt[entry]
+
+    return True
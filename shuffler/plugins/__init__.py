@@ -1,7 +1,21 @@
-from .eventloop import EventLoopPlugin
-from .sqlalchemy import AlchemyPlugin
+from typing import TYPE_CHECKING
+
+from shuffler.util import lazy_import
+
+if TYPE_CHECKING:
+    from .eventloop import EventLoopPlugin
+    from .sqlalchemy import AlchemyPlugin
 
 __all__ = [
     "EventLoopPlugin",
     "AlchemyPlugin",
 ]
+
+# `sqlalchemy` is only imported when `AlchemyPlugin` is used
+__getattr__, __dir__ = lazy_import(
+    __name__,
+    attributes={
+        "EventLoopPlugin": ".eventloop",
+        "AlchemyPlugin": ".sqlalchemy",
+    },
+)
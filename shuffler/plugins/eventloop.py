@@ -3,7 +3,8 @@ from collections import deque
 from contextlib import contextmanager
 from typing import Deque, Iterator, Self
 
-from shuffler.strategies import ExhaustiveStrategy, Strategy
+from shuffler.stats import ProgressCallback, Stats, StatsCollector
+from shuffler.strategies import ExhaustiveStrategy, Interner, Strategy
 
 
 class ShufflingLoop(asyncio.SelectorEventLoop):
@@ -16,8 +17,14 @@ class EventLoopPlugin:
     def __init__(
         self,
         strategy: Strategy[int] = ExhaustiveStrategy(),
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 1.0,
     ) -> None:
         self._strategy = strategy
+        self._metrics = StatsCollector(
+            strategy, progress, progress_interval, infer_run_time=True
+        )
+        self._interner: Interner[int] = Interner()
         self.enabled = False
 
     def enable(self) -> None:
@@ -44,10 +51,15 @@ class EventLoopPlugin:
         return self._strategy.is_completed()
 
     def finish_sequence(self) -> list[int]:
-        return self._strategy.finish_sequence()
+        return self._metrics.finish_sequence()
 
     def reset(self) -> None:
         self._strategy.reset()
+        self._metrics.reset()
+
+    @property
+    def stats(self) -> Stats:
+        return self._metrics.stats
 
 
 def _event_loop_policy(plugin: EventLoopPlugin) -> asyncio.AbstractEventLoopPolicy:
@@ -62,9 +74,14 @@ def _new_event_loop(plugin: EventLoopPlugin) -> ShufflingLoop:
     class FakeDeque(deque[asyncio.Handle]):
         def popleft(self) -> asyncio.Handle:
             if plugin.enabled and len(self) > 1:
-                ix = plugin._strategy.choose_next(set(range(len(self))))
+                # Positions in the ready queue are the options, interned in order
+                interner = plugin._interner
+                while len(interner.ids) < len(self):
+                    interner.bit(len(interner.ids))
+
+                ix = plugin._metrics.choose_next_mask((1 << len(self)) - 1, interner)
                 nxt = self[ix]
-                self.remove(self[ix])
+                del self[ix]
                 return nxt
 
             return super().popleft()
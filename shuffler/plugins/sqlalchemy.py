@@ -3,13 +3,24 @@ import logging
 import time
 from contextlib import suppress
 from contextvars import ContextVar
-from typing import Any, AsyncIterator, Callable, Coroutine, Self, TypeAlias
+from enum import StrEnum
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Iterable,
+    Self,
+    TypeAlias,
+)
 
 from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.util.concurrency import await_fallback
 
-from shuffler.strategies import ExhaustiveStrategy, Strategy
+from shuffler.stats import ProgressCallback, Stats, StatsCollector
+from shuffler.strategies import ExhaustiveStrategy, Interner, Strategy
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +29,39 @@ TaskID: TypeAlias = int
 current_task: ContextVar[TaskID | None] = ContextVar("current_task", default=None)
 
 
+class Hook(StrEnum):
+    """SQLAlchemy events that act as scheduling points"""
+
+    EXECUTE = "before_cursor_execute"
+    CHECKOUT = "checkout"
+    CHECKIN = "checkin"
+    BEGIN = "begin"
+    COMMIT = "commit"
+    ROLLBACK = "rollback"
+
+
 class AlchemyPlugin:
     def __init__(
         self,
         engine: AsyncEngine,
         strategy: Strategy[TaskID] = ExhaustiveStrategy(),
         max_wait_for: float = 0.020,
+        hooks: Iterable[Hook] = (Hook.EXECUTE,),
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 1.0,
     ) -> None:
         self._engine = engine.sync_engine
         self._strategy = strategy
+        self._metrics = StatsCollector(
+            strategy, progress, progress_interval, infer_run_time=True
+        )
         self._max_wait_for = max_wait_for
+        self._listeners = {hook: partial(self._on_event, hook) for hook in hooks}
+        assert self._listeners
 
-        self._pending: set[TaskID] = set()
+        # Bitmask of interned task IDs
+        self._pending = 0
+        self._interner: Interner[TaskID] = Interner()
         self._pool_changed = asyncio.Event()
         self._cur_pool_size = 0
         self._is_started = False
@@ -42,46 +74,38 @@ class AlchemyPlugin:
         self.stop()
 
     def start(self) -> None:
-        event.listen(
-            self._engine,
-            "before_cursor_execute",
-            self._before_execute,
-            named=True,
-        )
+        for hook, listener in self._listeners.items():
+            event.listen(self._engine, hook, listener, named=True)
+            logger.debug("`%s` hook installed", hook)
         self._is_started = True
-        logger.debug("`before_cursor_execute` hook installed")
 
     def stop(self) -> None:
-        event.remove(
-            self._engine,
-            "before_cursor_execute",
-            self._before_execute,
-        )
+        for hook, listener in self._listeners.items():
+            event.remove(self._engine, hook, listener)
+            logger.debug("`%s` hook removed", hook)
         self._is_started = False
-        logger.debug("`before_cursor_execute` hook removed")
 
-    def _before_execute(
-        self,
-        statement: str,
-        **_: Any,
-    ) -> None:
+    def _on_event(self, hook: Hook, **kwargs: Any) -> None:
         if (task_id := current_task.get()) is None:
             return
 
         self._shuffle(task_id)
-        logger.debug("Task %s: Executing query: %s", task_id, statement)
+        if hook is Hook.EXECUTE:
+            logger.debug("Task %s: Executing query: %s", task_id, kwargs["statement"])
+        else:
+            logger.debug("Task %s: %s", task_id, hook.name.lower())
 
     def _shuffle(self, task_id: TaskID) -> None:
-        self._pending.add(task_id)
+        bit = self._interner.bit(task_id)
+        self._pending |= bit
         self._pool_changed.set()
 
         while True:
             elapsed = 0.0
             started_at = time.monotonic()
             while elapsed < self._max_wait_for:
-                if (
-                    task_id not in self._pending
-                    or len(self._pending) >= self._cur_pool_size
+                if not self._pending & bit or (
+                    self._pending.bit_count() >= self._cur_pool_size
                 ):
                     break
 
@@ -95,14 +119,15 @@ class AlchemyPlugin:
                     )
                 elapsed = time.monotonic() - started_at
 
-            if task_id not in self._pending:
+            if not self._pending & bit:
                 break
 
-            to_release = self._strategy.choose_next(self._pending)
-            self._pending.remove(to_release)
+            self._metrics.add_wait_time(elapsed)
+            to_release = self._metrics.choose_next_mask(self._pending, self._interner)
+            self._pending ^= 1 << to_release
             self._pool_changed.set()
 
-            if task_id not in self._pending:
+            if not self._pending & bit:
                 break
 
     def _decrement_pool_size(self) -> None:
@@ -111,13 +136,18 @@ class AlchemyPlugin:
         self._pool_changed.set()
 
     def _finish_sequence(self) -> list[TaskID]:
-        return self._strategy.finish_sequence()
+        return self._metrics.finish_sequence()
 
     def strategy_completed(self) -> bool:
         return self._strategy.is_completed()
 
     def reset(self) -> None:
         self._strategy.reset()
+        self._metrics.reset()
+
+    @property
+    def stats(self) -> Stats:
+        return self._metrics.stats
 
     async def run(
         self,
@@ -161,4 +191,4 @@ class AlchemyPlugin:
             for ix, operation in enumerate(operations, start=1):
                 tg.create_task(wrapper(operation, task_id=ix))
 
-        return self._strategy.finish_sequence()
+        return self._finish_sequence()
@@ -0,0 +1,13 @@
+from typing import TYPE_CHECKING
+
+from shuffler.util import lazy_import
+
+if TYPE_CHECKING:
+    from . import asyncio, threading
+
+__all__ = [
+    "asyncio",
+    "threading",
+]
+
+__getattr__, __dir__ = lazy_import(__name__, submodules=__all__)
@@ -0,0 +1,229 @@
+"""
+Drop-in replacements for `asyncio.Lock`, `Semaphore`, `Event` and `Queue`
+that let `AsyncioShuffler` know when a task blocks or gets released: blocked
+tasks aren't waited for at scheduling points, the strategy is only offered
+runnable tasks and deadlocks are reported immediately.
+Tasks that aren't registered with the shuffler get the plain behaviour
+"""
+
+from __future__ import annotations
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, TypeVar
+
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.shufflers.protocol import TaskID
+
+T = TypeVar("T")
+
+
+class _Resource:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"<{self.name}>"
+
+
+class _Waiters:
+    """Futures of plain (non-shuffler) tasks"""
+
+    def __init__(self) -> None:
+        self._futures: deque[asyncio.Future[None]] = deque()
+
+    async def wait(self) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._futures.append(future)
+        try:
+            await future
+        finally:
+            if future in self._futures:
+                self._futures.remove(future)
+
+    def wake(self, n: int | None = None) -> None:
+        woken = 0
+        while self._futures and (n is None or woken < n):
+            future = self._futures.popleft()
+            if not future.done():
+                future.set_result(None)
+                woken += 1
+
+
+class Lock:
+    def __init__(self, shuffler: AsyncioShuffler) -> None:
+        self._shuffler = shuffler
+        self._locked = False
+        self._owner: TaskID | None = None
+        self._waiters = _Waiters()
+
+    def __repr__(self) -> str:
+        return f"<Lock owner={self._owner!r}>"
+
+    async def acquire(self) -> bool:
+        task_id = self._shuffler.current_task()
+        while self._locked:
+            if task_id is None:
+                await self._waiters.wait()
+            else:
+                await self._shuffler.wait_blocked(self, owner=self._owner)
+
+        self._locked = True
+        self._owner = task_id
+        return True
+
+    def release(self) -> None:
+        if not self._locked:
+            raise RuntimeError("Lock is not acquired.")
+
+        self._locked = False
+        self._owner = None
+        # Every waiter becomes runnable, the strategy decides who gets the lock
+        self._shuffler.notify_blocked(self)
+        self._waiters.wake(1)
+
+    def locked(self) -> bool:
+        return self._locked
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *_: object) -> None:
+        self.release()
+
+
+class Semaphore:
+    def __init__(self, shuffler: AsyncioShuffler, value: int = 1) -> None:
+        if value < 0:
+            raise ValueError("Semaphore initial value must be >= 0")
+
+        self._shuffler = shuffler
+        self._value = value
+        self._waiters = _Waiters()
+
+    def __repr__(self) -> str:
+        return f"<Semaphore value={self._value}>"
+
+    def locked(self) -> bool:
+        return self._value == 0
+
+    async def acquire(self) -> bool:
+        while self._value <= 0:
+            if self._shuffler.current_task() is None:
+                await self._waiters.wait()
+            else:
+                await self._shuffler.wait_blocked(self)
+
+        self._value -= 1
+        return True
+
+    def release(self) -> None:
+        self._value += 1
+        self._shuffler.notify_blocked(self)
+        self._waiters.wake(1)
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *_: object) -> None:
+        self.release()
+
+
+class Event:
+    def __init__(self, shuffler: AsyncioShuffler) -> None:
+        self._shuffler = shuffler
+        self._value = False
+        self._waiters = _Waiters()
+
+    def __repr__(self) -> str:
+        return f"<Event {'set' if self._value else 'unset'}>"
+
+    def is_set(self) -> bool:
+        return self._value
+
+    def set(self) -> None:
+        if not self._value:
+            self._value = True
+            self._shuffler.notify_blocked(self)
+            self._waiters.wake()
+
+    def clear(self) -> None:
+        self._value = False
+
+    async def wait(self) -> bool:
+        while not self._value:
+            if self._shuffler.current_task() is None:
+                await self._waiters.wait()
+            else:
+                await self._shuffler.wait_blocked(self)
+        return True
+
+
+class Queue(asyncio.Queue[T]):
+    def __init__(self, shuffler: AsyncioShuffler, maxsize: int = 0) -> None:
+        super().__init__(maxsize)
+        self._shuffler = shuffler
+        self._not_empty = _Resource("Queue not empty")
+        self._not_full = _Resource("Queue not full")
+        self._all_done = _Resource("Queue tasks done")
+
+    async def put(self, item: T) -> None:
+        if self._shuffler.current_task() is None:
+            return await super().put(item)
+
+        while self.full():
+            await self._shuffler.wait_blocked(self._not_full)
+        return self.put_nowait(item)
+
+    def put_nowait(self, item: T) -> None:
+        super().put_nowait(item)
+        self._shuffler.notify_blocked(self._not_empty)
+
+    async def get(self) -> T:
+        if self._shuffler.current_task() is None:
+            return await super().get()
+
+        while self.empty():
+            await self._shuffler.wait_blocked(self._not_empty)
+        return self.get_nowait()
+
+    def get_nowait(self) -> T:
+        item = super().get_nowait()
+        self._shuffler.notify_blocked(self._not_full)
+        return item
+
+    def task_done(self) -> None:
+        super().task_done()
+        if not self._unfinished_tasks:  # type: ignore[attr-defined]
+            self._shuffler.notify_blocked(self._all_done)
+
+    async def join(self) -> None:
+        if self._shuffler.current_task() is None:
+            return await super().join()
+
+        while self._unfinished_tasks:  # type: ignore[attr-defined]
+            await self._shuffler.wait_blocked(self._all_done)
+        return None
+
+
+@contextmanager
+def patch(shuffler: AsyncioShuffler) -> Iterator[None]:
+    """
+    Replaces `asyncio.Lock`, `Semaphore`, `Event` and `Queue` with instrumented
+    versions, so that code under test doesn't need to be changed.
+    The shuffler itself has to be created beforehand
+    """
+    replacements: dict[str, Any] = {
+        "Lock": lambda: Lock(shuffler),
+        "Semaphore": lambda value=1: Semaphore(shuffler, value),
+        "Event": lambda: Event(shuffler),
+        "Queue": lambda maxsize=0: Queue(shuffler, maxsize),
+    }
+    originals = {name: getattr(asyncio, name) for name in replacements}
+    for name, replacement in replacements.items():
+        setattr(asyncio, name, replacement)
+    try:
+        yield
+    finally:
+        for name, original in originals.items():
+            setattr(asyncio, name, original)
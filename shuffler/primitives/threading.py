@@ -0,0 +1,258 @@
+"""
+Drop-in replacements for `threading.Lock`, `RLock`, `Condition` and
+`queue.Queue` that let `ThreadingShuffler` know when a task blocks or gets
+released: blocked tasks aren't waited for at scheduling points, the strategy
+is only offered runnable tasks and deadlocks are reported immediately.
+Threads that aren't running a shuffler task get the plain behaviour
+"""
+
+from __future__ import annotations
+import _thread
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, TypeVar
+
+from shuffler.shufflers.protocol import TaskID
+from shuffler.shufflers.threading import ThreadingShuffler
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class Lock:
+    def __init__(self, shuffler: ThreadingShuffler) -> None:
+        self._shuffler = shuffler
+        self._lock = _thread.allocate_lock()
+        self._owner: TaskID | None = None
+
+    def __repr__(self) -> str:
+        return f"<Lock owner={self._owner!r}>"
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        task_id = self._shuffler.current_task()
+        if task_id is None:
+            return self._lock.acquire(blocking, timeout)
+
+        acquired = False
+
+        def retry() -> bool:
+            # Once registered as blocked, a release meanwhile can't be missed
+            nonlocal acquired
+            acquired = self._lock.acquire(blocking=False)
+            return acquired
+
+        deadline = None if timeout < 0 else time.monotonic() + timeout
+        while not self._lock.acquire(blocking=False):
+            if not blocking:
+                return False
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._shuffler.wait_blocked(
+                self, remaining, owner=self._owner, unless=retry
+            )
+            if acquired:
+                break
+
+        self._owner = task_id
+        return True
+
+    def release(self) -> None:
+        self._owner = None
+        self._lock.release()
+        # Every waiter becomes runnable, the strategy decides who gets the lock
+        self._shuffler.notify_blocked(self)
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *_: object) -> None:
+        self.release()
+
+    def _release_save(self) -> None:
+        self.release()
+
+    def _acquire_restore(self, _: None) -> None:
+        self.acquire()
+
+    def _is_owned(self) -> bool:
+        return self._lock.locked() and self._owner == self._shuffler.current_task()
+
+
+class RLock:
+    def __init__(self, shuffler: ThreadingShuffler) -> None:
+        self._lock = Lock(shuffler)
+        self._owner: int | None = None
+        self._count = 0
+
+    def __repr__(self) -> str:
+        return f"<RLock owner={self._owner!r} count={self._count}>"
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        me = threading.get_ident()
+        if self._owner == me:
+            self._count += 1
+            return True
+        if not self._lock.acquire(blocking, timeout):
+            return False
+
+        self._owner, self._count = me, 1
+        return True
+
+    def release(self) -> None:
+        if self._owner != threading.get_ident():
+            raise RuntimeError("cannot release un-acquired lock")
+
+        self._count -= 1
+        if not self._count:
+            self._owner = None
+            self._lock.release()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *_: object) -> None:
+        self.release()
+
+    def _release_save(self) -> tuple[int, int | None]:
+        state = self._count, self._owner
+        self._count, self._owner = 0, None
+        self._lock.release()
+        return state
+
+    def _acquire_restore(self, state: tuple[int, int | None]) -> None:
+        self._lock.acquire()
+        self._count, self._owner = state
+
+    def _is_owned(self) -> bool:
+        return self._owner == threading.get_ident()
+
+
+class Condition:
+    def __init__(
+        self,
+        shuffler: ThreadingShuffler,
+        lock: Lock | RLock | None = None,
+    ) -> None:
+        self._shuffler = shuffler
+        self._lock = lock if lock is not None else RLock(shuffler)
+        self.acquire = self._lock.acquire
+        self.release = self._lock.release
+        # Waiters from threads which aren't shuffler tasks
+        self._plain_waiters: list[_thread.LockType] = []
+
+    def __repr__(self) -> str:
+        return f"<Condition {self._lock!r}>"
+
+    def __enter__(self) -> bool:
+        return self._lock.__enter__()
+
+    def __exit__(self, *args: object) -> None:
+        self._lock.__exit__(*args)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if not self._lock._is_owned():
+            raise RuntimeError("cannot wait on un-acquired lock")
+
+        if self._shuffler.current_task() is None:
+            waiter = _thread.allocate_lock()
+            waiter.acquire()
+            self._plain_waiters.append(waiter)
+            state = self._lock._release_save()
+            try:
+                notified = waiter.acquire(True, -1 if timeout is None else timeout)
+                if not notified:
+                    self._plain_waiters.remove(waiter)
+                return notified
+            finally:
+                self._lock._acquire_restore(state)  # type: ignore[arg-type]
+
+        state = None
+
+        def release() -> bool:
+            # Only once registered as blocked, so that notifiers acquiring the
+            # lock right away can't miss the task
+            nonlocal state
+            state = self._lock._release_save()
+            return False
+
+        try:
+            return self._shuffler.wait_blocked(self, timeout, unless=release)
+        finally:
+            self._lock._acquire_restore(state)  # type: ignore[arg-type]
+
+    def wait_for(
+        self,
+        predicate: Callable[[], R],
+        timeout: float | None = None,
+    ) -> R:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        result = predicate()
+        while not result:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+            self.wait(remaining)
+            result = predicate()
+        return result
+
+    def notify(self, n: int = 1) -> None:
+        self._notify(n)
+
+    def notify_all(self) -> None:
+        self._notify(None)
+
+    def _notify(self, n: int | None) -> None:
+        if not self._lock._is_owned():
+            raise RuntimeError("cannot notify on un-acquired lock")
+
+        woken = self._shuffler.notify_blocked(self, n)
+        while (n is None or woken < n) and self._plain_waiters:
+            self._plain_waiters.pop(0).release()
+            woken += 1
+
+
+class Queue(queue.Queue[T]):
+    def __init__(self, shuffler: ThreadingShuffler, maxsize: int = 0) -> None:
+        super().__init__(maxsize)
+        mutex = Lock(shuffler)
+        self.mutex = mutex  # type: ignore[assignment]
+        self.not_empty = Condition(shuffler, mutex)  # type: ignore[assignment]
+        self.not_full = Condition(shuffler, mutex)  # type: ignore[assignment]
+        self.all_tasks_done = Condition(shuffler, mutex)  # type: ignore[assignment]
+
+
+@contextmanager
+def patch(shuffler: ThreadingShuffler) -> Iterator[None]:
+    """
+    Replaces `threading.Lock`, `threading.RLock`, `threading.Condition` and
+    `queue.Queue` with instrumented versions, so that code under test doesn't
+    need to be changed. The shuffler itself has to be created beforehand
+    """
+    originals: list[tuple[Any, str, Any]] = [
+        (threading, "Lock", threading.Lock),
+        (threading, "RLock", threading.RLock),
+        (threading, "Condition", threading.Condition),
+        (queue, "Queue", queue.Queue),
+    ]
+    replacements: dict[str, Any] = {
+        "Lock": lambda: Lock(shuffler),
+        "RLock": lambda: RLock(shuffler),
+        "Condition": lambda lock=None: Condition(shuffler, lock),
+        "Queue": lambda maxsize=0: Queue(shuffler, maxsize),
+    }
+    for module, name, _ in originals:
+        setattr(module, name, replacements[name])
+    try:
+        yield
+    finally:
+        for module, name, original in originals:
+            setattr(module, name, original)
@@ -0,0 +1,506 @@
+"""
+Runs a test body under a shuffler until its strategy is completed or the
+budget is spent, optionally spreading iterations over forked worker processes:
+
+    @explore(
+        lambda strategy: AsyncioShuffler(pool_size=2, strategy=strategy),
+        timeout=30,
+    )
+    async def test_increment(shuffler: AsyncioShuffler) -> None:
+        ...  # a single iteration
+
+Failures are reported with the failing sequence and a replay seed, which can
+be passed back via `--shuffler-replay` or `explore(..., replay=...)`. Seeds
+are bound to the test they were reported by, other tests ignore them
+"""
+
+from __future__ import annotations
+import asyncio
+import base64
+import functools
+import hashlib
+import inspect
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+import traceback
+import warnings
+from dataclasses import dataclass
+from multiprocessing.synchronize import Event
+from pathlib import Path
+from queue import Empty
+from typing import Any, Callable, Protocol, Sequence, TypeAlias
+
+import pytest
+
+from shuffler.corpus import Corpus
+from shuffler.strategies import (
+    CorpusStrategy,
+    ExhaustiveStrategy,
+    RandomStrategy,
+    ReplayStrategy,
+    Strategy,
+)
+
+StrategyFactory: TypeAlias = Callable[[], Strategy[Any]]
+
+
+class Shuffler(Protocol):
+    def finish_sequence(self) -> list[Any]: ...
+
+    def strategy_completed(self) -> bool: ...
+
+
+ShufflerFactory: TypeAlias = Callable[[Strategy[Any]], Shuffler]
+# Called as `body(shuffler=...)`
+Body: TypeAlias = Callable[..., Any]
+# Raised by the body, but not failures of an iteration
+_PASSTHROUGH = (
+    KeyboardInterrupt,
+    SystemExit,
+    pytest.skip.Exception,
+    pytest.xfail.Exception,
+)
+
+_config: pytest.Config | None = None
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("shuffler")
+    group.addoption(
+        "--shuffler-workers",
+        action="store",
+        default=None,
+        help="Number of worker processes per explored test (or 'auto')",
+    )
+    group.addoption(
+        "--shuffler-timeout",
+        action="store",
+        type=float,
+        default=None,
+        help="Default time budget (in seconds) per explored test",
+    )
+    group.addoption(
+        "--shuffler-replay",
+        action="store",
+        default=None,
+        help="Replay a single sequence reported by a failed explored test",
+    )
+    group.addoption(
+        "--shuffler-corpus",
+        action="store",
+        default=None,
+        help="File of schedules explored by earlier runs, see `shuffler.corpus`",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    global _config  # noqa: PLW0603
+    _config = config
+
+
+def pytest_unconfigure() -> None:
+    global _config  # noqa: PLW0603
+    _config = None
+
+
+def _option(name: str) -> Any:
+    return None if _config is None else _config.getoption(name)
+
+
+def _key_hash(key: str) -> str:
+    return hashlib.blake2b(key.encode(), digest_size=4).hexdigest()
+
+
+def encode_replay(sequence: list[Any], key: str | None = None) -> str:
+    """Replay seed of `sequence`, bound to the test `key` if given"""
+    record: dict[str, Any] = {"sequence": sequence}
+    if key is not None:
+        record["test"] = _key_hash(key)
+    return base64.urlsafe_b64encode(json.dumps(record).encode()).decode()
+
+
+def _decode(seed: str) -> dict[str, Any]:
+    record = json.loads(base64.urlsafe_b64decode(seed.encode()))
+    assert isinstance(record, dict)
+    return record
+
+
+def decode_replay(seed: str) -> list[Any]:
+    sequence = _decode(seed)["sequence"]
+    assert isinstance(sequence, list)
+    return sequence
+
+
+def replays_test(seed: str, key: str) -> bool:
+    """Whether `seed` was reported by the test `key` (or isn't bound to any)"""
+    test = _decode(seed).get("test")
+    return test is None or test == _key_hash(key)
+
+
+class ExplorationFailed(AssertionError):
+    pass
+
+
+@dataclass
+class Failure:
+    iteration: int
+    worker: int
+    sequence: list[Any]
+    traceback: str
+
+    def describe(self, key: str | None = None) -> str:
+        return (
+            f"Failed on iteration {self.iteration} (worker {self.worker}) "
+            f"with sequence {self.sequence}\n"
+            f"Replay with --shuffler-replay={encode_replay(self.sequence, key)}"
+        )
+
+
+@dataclass
+class _Budget:
+    max_iterations: float
+    deadline: float
+    stop: Event | None = None
+
+    def exhausted(self, iterations: int) -> bool:
+        return (
+            iterations >= self.max_iterations
+            or time.monotonic() >= self.deadline
+            or (self.stop is not None and self.stop.is_set())
+        )
+
+
+def _failure(shuffler: Shuffler, iteration: int, worker: int) -> Failure:
+    return Failure(
+        iteration=iteration,
+        worker=worker,
+        sequence=shuffler.finish_sequence(),
+        traceback=traceback.format_exc(),
+    )
+
+
+def _record(corpus: Corpus | None, sequence: list[Any], passed: bool) -> None:
+    if corpus is not None:
+        corpus.record(sequence, passed)
+
+
+def _run_sync(
+    body: Body,
+    corpus: Corpus | None,
+    shuffler: Shuffler,
+    budget: _Budget,
+    worker: int,
+) -> tuple[int, Failure | None]:
+    iterations = 0
+    while not shuffler.strategy_completed() and not budget.exhausted(iterations):
+        iterations += 1
+        try:
+            body(shuffler=shuffler)
+        except _PASSTHROUGH:
+            raise
+        except BaseException:
+            # E.g. `pytest.fail(...)`, which doesn't derive from `Exception`
+            failure = _failure(shuffler, iterations, worker)
+            _record(corpus, failure.sequence, passed=False)
+            return iterations, failure
+        _record(corpus, shuffler.finish_sequence(), passed=True)
+
+    return iterations, None
+
+
+def _run_async(
+    body: Body,
+    corpus: Corpus | None,
+    shuffler: Shuffler,
+    budget: _Budget,
+    worker: int,
+) -> tuple[int, Failure | None]:
+    async def run() -> tuple[int, Failure | None]:
+        iterations = 0
+        while not shuffler.strategy_completed() and not budget.exhausted(iterations):
+            iterations += 1
+            try:
+                await body(shuffler=shuffler)
+            except _PASSTHROUGH:
+                raise
+            except BaseException:
+                failure = _failure(shuffler, iterations, worker)
+                _record(corpus, failure.sequence, passed=False)
+                return iterations, failure
+            _record(corpus, shuffler.finish_sequence(), passed=True)
+
+        return iterations, None
+
+    return asyncio.run(run())
+
+
+def _split_iterations(
+    strategy: Strategy[Any],
+    budget: _Budget,
+    n_workers: int,
+    done: int,
+) -> list[float]:
+    remaining = budget.max_iterations - done
+    if isinstance(strategy, RandomStrategy):
+        remaining = min(remaining, strategy.max_iterations - done)
+    if math.isinf(remaining):
+        return [math.inf] * n_workers
+
+    quota, extra = divmod(int(remaining), n_workers)
+    return [quota + (ix < extra) for ix in range(n_workers)]
+
+
+def _collect(
+    processes: Sequence[multiprocessing.process.BaseProcess],
+    results: multiprocessing.Queue[tuple[int, Failure | None]],
+    stop: Event,
+) -> tuple[int, Failure | None]:
+    total, failure = 0, None
+    for _ in processes:
+        while True:
+            try:
+                iterations, worker_failure = results.get(timeout=0.1)
+                break
+            except Empty:
+                if any(process.is_alive() for process in processes):
+                    continue
+                try:
+                    iterations, worker_failure = results.get(timeout=1)
+                    break
+                except Empty:
+                    raise RuntimeError("Worker process died") from None
+
+        total += iterations
+        if worker_failure is not None and failure is None:
+            failure = worker_failure
+            stop.set()
+
+    for process in processes:
+        process.join()
+
+    return total, failure
+
+
+def _run_workers(
+    run: Callable[[Shuffler, _Budget, int], tuple[int, Failure | None]],
+    shuffler_factory: ShufflerFactory,
+    strategy: Strategy[Any],
+    budget: _Budget,
+    n_workers: int,
+    done: int,
+) -> tuple[int, Failure | None]:
+    match strategy:
+        case ExhaustiveStrategy():
+            n_workers = min(n_workers, strategy.n_shards())
+        case RandomStrategy():
+            pass
+        case _:
+            n_workers = 1
+
+    # Forked workers would share the random state otherwise
+    base_seed = random.random()
+    ctx = multiprocessing.get_context("fork")
+    stop = ctx.Event()
+    results: multiprocessing.Queue[tuple[int, Failure | None]] = ctx.Queue()
+
+    def target(index: int, max_iterations: float) -> None:
+        match strategy:
+            case ExhaustiveStrategy():
+                strategy.shard(index, n_workers)
+            case RandomStrategy():
+                strategy.seed(f"{base_seed}-{index}")
+                # Iterations are limited by the worker's budget instead
+                strategy.reset()
+
+        result: tuple[int, Failure | None] = (0, None)
+        try:
+            worker_budget = _Budget(max_iterations, budget.deadline, stop)
+            result = run(shuffler_factory(strategy), worker_budget, index + 1)
+        except BaseException:
+            result = (0, Failure(0, index + 1, [], traceback.format_exc()))
+        finally:
+            results.put(result)
+
+    processes = [
+        ctx.Process(target=target, args=(ix, quota), daemon=True)
+        for ix, quota in enumerate(_split_iterations(strategy, budget, n_workers, done))
+    ]
+    with warnings.catch_warnings():
+        # Threads of finished iterations may still be winding down at this point
+        warnings.filterwarnings("ignore", "This process .* is multi-threaded")
+        for process in processes:
+            process.start()
+
+    return _collect(processes, results, stop)
+
+
+def _replay_failures(
+    run: Callable[[Shuffler, _Budget, int], tuple[int, Failure | None]],
+    shuffler_factory: ShufflerFactory,
+    corpus: Corpus,
+    deadline: float,
+) -> tuple[int, Failure | None]:
+    iterations = 0
+    for sequence in corpus.failures():
+        budget = _Budget(max_iterations=1, deadline=deadline)
+        n_iterations, failure = run(
+            shuffler_factory(ReplayStrategy(sequence)), budget, 0
+        )
+        iterations += n_iterations
+        if failure is not None:
+            return iterations, failure
+
+    return iterations, None
+
+
+def _explore(
+    run: Callable[[Shuffler, _Budget, int], tuple[int, Failure | None]],
+    shuffler_factory: ShufflerFactory,
+    strategy: Strategy[Any],
+    budget: _Budget,
+    workers: int,
+) -> tuple[int, Failure | None]:
+    if workers <= 1:
+        return run(shuffler_factory(strategy), budget, 0)
+
+    first = _Budget(max_iterations=1, deadline=budget.deadline)
+    iterations, failure = run(shuffler_factory(strategy), first, 0)
+    if (
+        failure is None
+        and not strategy.is_completed()
+        and not budget.exhausted(iterations)
+    ):
+        n_iterations, failure = _run_workers(
+            run, shuffler_factory, strategy, budget, workers, done=iterations
+        )
+        iterations += n_iterations
+
+    return iterations, failure
+
+
+def run_exploration(  # noqa: PLR0913
+    body: Body,
+    shuffler_factory: ShufflerFactory,
+    strategy: StrategyFactory = ExhaustiveStrategy,
+    *,
+    max_iterations: int | None = None,
+    timeout: float | None = None,
+    workers: int = 1,
+    replay: str | None = None,
+    corpus: Corpus | None = None,
+    key: str | None = None,
+) -> int:
+    """
+    Calls `body(shuffler=...)` once per iteration until the strategy is completed
+    or the budget is spent, returns the number of iterations.
+    With `workers` > 1, the first iteration runs in-process and the rest of the
+    search is split across forked worker processes.
+    With a `corpus`, failures recorded by earlier runs are replayed first and
+    outcomes of all iterations are recorded.
+    A `replay` that can't follow its sequence fails. Reported seeds are bound
+    to the test `key`
+    """
+    run = functools.partial(
+        _run_async if inspect.iscoroutinefunction(body) else _run_sync, body, corpus
+    )
+    replayed = ReplayStrategy(decode_replay(replay)) if replay else None
+    strategy_instance = replayed if replayed is not None else strategy()
+    match strategy_instance:
+        case CorpusStrategy(corpus=None):
+            strategy_instance.corpus = corpus
+    budget = _Budget(
+        max_iterations=math.inf if max_iterations is None else max_iterations,
+        deadline=math.inf if timeout is None else time.monotonic() + timeout,
+    )
+
+    iterations, failure = 0, None
+    if corpus is not None and not replay:
+        iterations, failure = _replay_failures(
+            run, shuffler_factory, corpus, budget.deadline
+        )
+    if failure is None:
+        n_iterations, failure = _explore(
+            run,
+            shuffler_factory,
+            strategy_instance,
+            budget,
+            workers=1 if replay else workers,
+        )
+        iterations += n_iterations
+
+    if replayed is not None and replayed.diverged_at is not None:
+        message = f"Replay diverged from its sequence at step {replayed.diverged_at}"
+        if failure is not None:
+            message += f", then failed:\n{failure.traceback}"
+        raise ExplorationFailed(message)
+    if failure is not None:
+        raise ExplorationFailed(f"{failure.describe(key)}\n\n{failure.traceback}")
+
+    return iterations
+
+
+def _key(fn: Callable[..., Any]) -> str:
+    # E.g. "tests/test_db.py::test_increment[2] (call)"
+    if current_test := os.environ.get("PYTEST_CURRENT_TEST"):
+        return current_test.rsplit(" ", 1)[0]
+    return f"{fn.__module__}::{fn.__qualname__}"
+
+
+def explore(
+    shuffler_factory: ShufflerFactory,
+    strategy: StrategyFactory = ExhaustiveStrategy,
+    *,
+    max_iterations: int | None = None,
+    timeout: float | None = None,
+    workers: int | None = None,
+    replay: str | None = None,
+    corpus: str | Path | None = None,
+) -> Callable[[Callable[..., Any]], Callable[..., None]]:
+    """
+    Decorates a test taking a `shuffler` argument, see `run_exploration`.
+    `timeout`, `workers`, `replay` and `corpus` (a file path) default to
+    `--shuffler-*` options. Corpus records are keyed by the test's node id
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., None]:
+        signature = inspect.signature(fn)
+        assert "shuffler" in signature.parameters
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> None:
+            n_workers = workers or _option("shuffler_workers") or 1
+            if n_workers == "auto":
+                n_workers = os.cpu_count() or 1
+
+            key = _key(fn)
+            seed = _option("shuffler_replay")
+            if seed is not None and not replays_test(seed, key):
+                # Reported by another test of the session
+                seed = None
+            corpus_path = corpus or _option("shuffler_corpus")
+            run_exploration(
+                functools.partial(fn, *args, **kwargs),
+                shuffler_factory,
+                strategy,
+                max_iterations=max_iterations,
+                timeout=timeout or _option("shuffler_timeout"),
+                workers=int(n_workers),
+                replay=seed or replay,
+                corpus=None if corpus_path is None else Corpus(corpus_path, key),
+                key=key,
+            )
+
+        wrapper.__signature__ = signature.replace(  # type: ignore[attr-defined]
+            parameters=[
+                param
+                for name, param in signature.parameters.items()
+                if name != "shuffler"
+            ]
+        )
+        return wrapper
+
+    return decorator
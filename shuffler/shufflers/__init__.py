@@ -1,6 +1,19 @@
-from .asyncio import AsyncioShuffler
-from .protocol import AsyncShuffler, SyncShuffler, TaskID
-from .threading import ThreadingShuffler
+from typing import TYPE_CHECKING
+
+from shuffler.util import lazy_import
+
+if TYPE_CHECKING:
+    from .asyncio import AsyncioShuffler
+    from .monitoring import Monitor
+    from .process import ProcessShuffler
+    from .protocol import (
+        AsyncShuffler,
+        DeadlockError,
+        LivelockError,
+        SyncShuffler,
+        TaskID,
+    )
+    from .threading import ThreadingShuffler
 
 __all__ = [
     "SyncShuffler",
@@ -8,4 +21,23 @@ __all__ = [
     "AsyncShuffler",
     "AsyncioShuffler",
     "ThreadingShuffler",
+    "ProcessShuffler",
+    "Monitor",
+    "DeadlockError",
+    "LivelockError",
 ]
+
+__getattr__, __dir__ = lazy_import(
+    __name__,
+    attributes={
+        "SyncShuffler": ".protocol",
+        "TaskID": ".protocol",
+        "AsyncShuffler": ".protocol",
+        "DeadlockError": ".protocol",
+        "LivelockError": ".protocol",
+        "AsyncioShuffler": ".asyncio",
+        "ThreadingShuffler": ".threading",
+        "ProcessShuffler": ".process",
+        "Monitor": ".monitoring",
+    },
+)
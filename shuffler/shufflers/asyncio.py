@@ -1,85 +1,355 @@
 from __future__ import annotations
 import asyncio
-from contextlib import asynccontextmanager, suppress
-from typing import AsyncIterator
+import functools
+import time
+from types import TracebackType
+from typing import Any, Callable, Coroutine, Sequence, TypeVar
 
-from shuffler.strategies import Strategy
+from shuffler.linearizability import History
+from shuffler.stats import ProgressCallback, Stats, StatsCollector
+from shuffler.strategies import Access, Interner, Strategy
 
+from .blocking import Blocked, BlockingShuffler
 from .protocol import AsyncShuffler, TaskID
 
+R = TypeVar("R")
 
-@asynccontextmanager
-async def move_on_after(timeout: float) -> AsyncIterator[None]:
-    with suppress(TimeoutError):
-        async with asyncio.timeout(timeout):
-            yield
 
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
 
-class AsyncioShuffler(AsyncShuffler):
+
+class Op:
+    """
+    Context manager of `AsyncioShuffler.shuffle`, a plain class rather than
+    `asynccontextmanager` as it's entered on every scheduling point
+    """
+
+    __slots__ = ("_shuffler", "_task_id", "_access", "_started_at")
+
+    def __init__(
+        self, shuffler: AsyncioShuffler, task_id: TaskID, access: Access | None
+    ) -> None:
+        self._shuffler = shuffler
+        self._task_id = task_id
+        self._access = access
+        self._started_at = 0.0
+
+    async def __aenter__(self) -> None:
+        shuffler = self._shuffler
+        if (task := asyncio.current_task()) is not None:
+            shuffler._tasks[task] = self._task_id
+        bit = shuffler._interner.bit(self._task_id)
+        if shuffler._declare_access is not None:
+            shuffler._declare_access(self._task_id, self._access)
+        shuffler._pending |= bit
+        shuffler._pool_changed.set()
+        await shuffler._wait_turn(bit)
+
+        shuffler._running = self._task_id
+        self._started_at = time.monotonic()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        shuffler = self._shuffler
+        shuffler._running = None
+        shuffler._metrics.add_run_time(time.monotonic() - self._started_at)
+        shuffler._op_finished.set()
+
+
+class AsyncioShuffler(BlockingShuffler, AsyncShuffler):
     def __init__(
         self,
         pool_size: int,
         strategy: Strategy[TaskID],
         max_wait_for: float = 0.020,
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 1.0,
+        history: History | None = None,
+        max_steps: int | None = None,
+        max_stalls: int | None = 100,
     ) -> None:
-        self._pending: set[TaskID] = set()
+        # Bitmask of interned task IDs
+        self._pending = 0
+        self._interner: Interner[TaskID] = Interner()
         self._strategy = strategy
+        self._metrics = StatsCollector(strategy, progress, progress_interval)
+        # Duck-typed strategies lack `Strategy.declare_access`
+        self._declare_access = getattr(strategy, "declare_access", None)
 
-        self._op_finished = asyncio.Event()
-        self._pool_changed = asyncio.Event()
+        self._op_finished: asyncio.Event = asyncio.Event()
+        self._pool_changed: asyncio.Event = asyncio.Event()
         self._pool_size = pool_size
         self._cur_pool_size = pool_size
         self._max_wait_for = max_wait_for
+        # Scheduling decisions per iteration before it's aborted as a livelock
+        self._max_steps = max_steps
+        self._steps = 0
+        # Decisions in a row made after `max_wait_for` expired with tasks of the
+        # pool missing, and none finishing, before it's aborted as a livelock
+        self._max_stalls = max_stalls
+        self._stalls = 0
+
+        # Calls recorded by the history are attributed to the current task
+        self._history = history
+        if history is not None:
+            history.current_task = self.current_task
+
+        self._blocked: dict[TaskID, Blocked] = {}
+        self._tasks: dict[asyncio.Task[object], TaskID] = {}
+        self._running: TaskID | None = None
+        # Error the current iteration was aborted with
+        self._aborted: RuntimeError | None = None
+        # Wakes up tasks waiting for the pool to fill up, see `_wait_pool`
+        self._timer: asyncio.TimerHandle | None = None
+        # Resolved once the pool is empty, see `_drained`
+        self._drained_waiter: asyncio.Future[None] | None = None
 
         self._op_finished.set()
 
-    @asynccontextmanager
-    async def shuffle(self, task_id: TaskID) -> AsyncIterator[None]:
-        self._pending.add(task_id)
-        self._pool_changed.set()
+    def current_task(self) -> TaskID | None:
+        if (task := asyncio.current_task()) is None:
+            return None
+        return self._tasks.get(task)
 
+    def shuffle(self, task_id: TaskID, access: Access | None = None) -> Op:
+        """
+        Runs the body as an op of `task_id` once scheduled. `access` declares
+        the resource it touches, ops of independent accesses may be reordered
+        freely (see `ExhaustiveStrategy`)
+        """
+        return Op(self, task_id, access)
+
+    def _ready(self, bit: int) -> bool:
+        """Whether the task has been released, or the pool is full"""
+        if self._aborted is not None:
+            raise self._aborted
+        return (
+            not self._pending & bit
+            # Blocked tasks won't reach a scheduling point by themselves
+            or self._pending.bit_count() + len(self._blocked) >= self._cur_pool_size
+        )
+
+    async def _wait_turn(self, bit: int) -> None:
         while True:
-            async with move_on_after(self._max_wait_for):
-                while True:
-                    if (
-                        task_id not in self._pending
-                        or len(self._pending) >= self._cur_pool_size
-                    ):
-                        break
-
-                    self._pool_changed.clear()
-                    await self._pool_changed.wait()
-
-            if task_id not in self._pending:
+            # Timers and clocks are only involved if the pool isn't full yet
+            if not self._ready(bit):
+                started_at = time.monotonic()
+                await self._wait_pool(bit)
+                if not self._pending & bit:
+                    break
+                self._metrics.add_wait_time(time.monotonic() - started_at)
+            elif not self._pending & bit:
                 break
 
-            await self._op_finished.wait()
+            if not self._op_finished.is_set():
+                await self._op_finished.wait()
             self._op_finished.clear()
-            to_release = self._strategy.choose_next(self._pending)
-            self._pending.remove(to_release)
+            self._check_livelock()
+            if self._aborted is not None:
+                # Lets other tasks waiting for their turn see the error
+                self._op_finished.set()
+                raise self._aborted
+            to_release = self._metrics.choose_next_mask(self._pending, self._interner)
+            self._pending ^= 1 << to_release
             self._pool_changed.set()
 
-            if task_id not in self._pending:
+            if not self._pending & bit:
                 break
 
+    async def _wait_pool(self, bit: int) -> None:
+        """Waits for the pool to fill up, for at most `max_wait_for`"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._max_wait_for
+        while not self._ready(bit):
+            if loop.time() >= deadline:
+                return
+            # All waiters share a timer, which isn't cancelled once they're done,
+            # so that it's only rescheduled every `max_wait_for` at most. Its
+            # deadline is never later than theirs
+            if self._timer is None:
+                self._timer = loop.call_at(deadline, self._timer_expired)
+            self._pool_changed.clear()
+            await self._pool_changed.wait()
+
+    def _timer_expired(self) -> None:
+        self._timer = None
+        self._pool_changed.set()
+
+    async def wait_blocked(
+        self,
+        resource: object,
+        timeout: float | None = None,
+        owner: TaskID | None = None,
+    ) -> bool:
+        """
+        Parks the current task until `resource` is signalled by `notify_blocked`,
+        then waits for the task to be scheduled again. An operation in progress
+        is suspended meanwhile. Returns False if `timeout` expired
+        """
+        task_id = self.current_task()
+        assert task_id is not None
+        # A plain future, as `asyncio.Event` may be instrumented by `patch`
+        wakeup: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        in_op = self._park(
+            task_id,
+            Blocked(
+                resource,
+                functools.partial(_resolve, wakeup),
+                owner,
+                timed=timeout is not None,
+            ),
+        )
+        self._pool_changed.set()
+
+        notified = True
         try:
-            yield
-        finally:
+            async with asyncio.timeout(timeout):
+                await wakeup
+        except TimeoutError:
+            if self._blocked.pop(task_id, None) is not None:
+                notified = False
+                self._pending |= self._interner.bit(task_id)
+                self._pool_changed.set()
+        except asyncio.CancelledError:
+            self._blocked.pop(task_id, None)
+            self._pool_changed.set()
+            raise
+
+        if self._aborted is not None:
+            raise self._aborted
+
+        await self._wait_turn(self._interner.bit(task_id))
+        if in_op:
+            self._running = task_id
+        else:
             self._op_finished.set()
+        return notified
 
     def decrement_pool_size(self) -> None:
         self._cur_pool_size -= 1
+        # A finished task is progress
+        self._stalls = 0
         assert self._cur_pool_size >= 0
+        self._check_deadlock()
+        self._pool_changed.set()
+        if not self._cur_pool_size and self._drained_waiter is not None:
+            self._drained_waiter.set_result(None)
+            self._drained_waiter = None
+
+    async def _drained(self) -> None:
+        """Waits until all tasks of the pool, spawned ones included, are done"""
+        if self._cur_pool_size:
+            self._drained_waiter = asyncio.get_running_loop().create_future()
+            await self._drained_waiter
+
+    def spawn(self, coro: Coroutine[Any, Any, R]) -> asyncio.Task[R]:
+        """
+        Runs `coro` in a new task counted in the pool until it's done, so that
+        it doesn't need to call `decrement_pool_size`
+        """
+        self._cur_pool_size += 1
         self._pool_changed.set()
+        return self._start(coro)
+
+    async def run_tasks(
+        self, *coros: Coroutine[Any, Any, Any], return_exceptions: bool = False
+    ) -> list[Any]:
+        """
+        Runs an iteration of `coros` (the pool size given to the shuffler is
+        ignored), each in a task of its own, and waits for them and for the
+        tasks they spawn. Returns their results, raises the first error unless
+        `return_exceptions`
+        """
+        self._cur_pool_size = len(coros)
+        tasks = [self._start(coro) for coro in coros]
+        await self._drained()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
+
+    def _start(self, coro: Coroutine[Any, Any, R]) -> asyncio.Task[R]:
+        return asyncio.create_task(self._run(coro))
+
+    async def _run(self, coro: Coroutine[Any, Any, R]) -> R:
+        try:
+            return await coro
+        finally:
+            # The task leaves the pool before anyone can see it done
+            self.decrement_pool_size()
+
+    async def explore(
+        self,
+        tasks_factory: Callable[[], Sequence[Coroutine[Any, Any, Any]]],
+        check: Callable[[], object] | None = None,
+    ) -> int:
+        """
+        Runs iterations of the coroutines returned by `tasks_factory` (like
+        `run_tasks`) and calls `check` after each of them, until the strategy
+        is completed. All iterations run on the current loop, without
+        `gather`. The first error is raised with the failing sequence in its
+        notes. Returns the number of iterations
+        """
+        iterations = 0
+        while not self._strategy.is_completed():
+            iterations += 1
+            coros = tasks_factory()
+            self._cur_pool_size = len(coros)
+            tasks = [self._start(coro) for coro in coros]
+            try:
+                await self._drained()
+                # Errors of all tasks are retrieved, not to be logged as never
+                # retrieved, but the first one is raised
+                for task in tasks:
+                    if not task.cancelled():
+                        task.exception()
+                for task in tasks:
+                    task.result()
+                if check is not None:
+                    check()
+            except Exception as e:
+                sequence = self.finish_sequence()
+                e.add_note(f"Failed on iteration {iterations} with sequence {sequence}")
+                raise
+            self.finish_sequence()
+        return iterations
 
     def finish_sequence(self) -> list[TaskID]:
         self._cur_pool_size = self._pool_size
-        return self._strategy.finish_sequence()
+        self._tasks.clear()
+        self._blocked.clear()
+        self._drained_waiter = None
+        self._pending = self._steps = self._stalls = 0
+        self._running = self._aborted = None
+        self._op_finished.set()
+        if self._history is not None:
+            self._history.clear()
+        return self._metrics.finish_sequence()
 
     def strategy_completed(self) -> bool:
         return self._strategy.is_completed()
 
     def reset(self) -> None:
         self._cur_pool_size = self._pool_size
+        self._tasks.clear()
+        self._blocked.clear()
+        self._drained_waiter = None
+        self._pending = self._steps = self._stalls = 0
+        self._running = self._aborted = None
         self._op_finished.set()
+        if self._history is not None:
+            self._history.clear()
         self._strategy.reset()
+        self._metrics.reset()
+
+    @property
+    def stats(self) -> Stats:
+        return self._metrics.stats
@@ -0,0 +1,160 @@
+"""
+Bookkeeping of tasks blocked on resources, shared by `ThreadingShuffler` and
+`AsyncioShuffler`: they only differ in how blocked tasks are parked and in
+their locking, see `wait_blocked` of either
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Protocol
+
+from shuffler.strategies import Interner
+from shuffler.util import find_cycle
+
+from .protocol import DeadlockError, LivelockError, TaskID
+
+
+class _Flag(Protocol):
+    def set(self) -> None: ...
+
+
+@dataclass
+class Blocked:
+    resource: object
+    # Makes the parked task continue, called once
+    wake: Callable[[], None]
+    owner: TaskID | None
+    timed: bool
+    # False while the task may still get the resource by itself, see
+    # `ThreadingShuffler.wait_blocked`
+    parked: bool = True
+
+
+class BlockingShuffler:
+    """
+    Base of shufflers whose tasks may block on resources: blocked tasks are
+    counted in the pool without reaching scheduling points, get runnable
+    again once notified, and iterations with no way forward are aborted
+    """
+
+    # Bitmask of interned task IDs
+    _pending: int
+    _interner: Interner[TaskID]
+    _blocked: dict[TaskID, Blocked]
+    _running: TaskID | None
+    # Error the current iteration was aborted with
+    _aborted: RuntimeError | None
+    _cur_pool_size: int
+    # Scheduling decisions per iteration before it's aborted as a livelock
+    _max_steps: int | None
+    _steps: int
+    # Decisions in a row without progress before the iteration is aborted
+    _max_stalls: int | None
+    _stalls: int
+    _op_finished: _Flag
+    _pool_changed: _Flag
+
+    def _park(self, task_id: TaskID, blocked: Blocked) -> bool:
+        """
+        Registers the current task as blocked, suspending its operation in
+        progress. Returns whether there was one
+        """
+        self._blocked[task_id] = blocked
+        return self._suspend(task_id)
+
+    def _suspend(self, task_id: TaskID) -> bool:
+        """Suspends the operation in progress of a parked task, if any"""
+        in_op = self._running == task_id
+        if in_op:
+            self._running = None
+            self._op_finished.set()
+        self._check_deadlock()
+        return in_op
+
+    def notify_blocked(self, resource: object, n: int | None = None) -> int:
+        """Makes (up to `n`) tasks blocked on `resource` runnable again"""
+        woken = 0
+        for task_id, blocked in list(self._blocked.items()):
+            if n is not None and woken >= n:
+                break
+            if blocked.resource is resource:
+                del self._blocked[task_id]
+                self._pending |= self._interner.bit(task_id)
+                blocked.wake()
+                woken += 1
+
+        if woken:
+            self._pool_changed.set()
+        return woken
+
+    def _check_deadlock(self) -> None:
+        """
+        Aborts the iteration on a cycle of tasks blocked on resources owned by
+        each other, or once all tasks are blocked without a timeout
+        """
+        if not self._blocked or self._aborted is not None:
+            return
+
+        owners = {
+            task_id: blocked.owner
+            for task_id, blocked in self._blocked.items()
+            if blocked.owner is not None and not blocked.timed
+        }
+        if (cycle := find_cycle(owners)) is None:
+            if (
+                self._pending
+                or len(self._blocked) < self._cur_pool_size
+                or any(
+                    blocked.timed or not blocked.parked
+                    for blocked in self._blocked.values()
+                )
+            ):
+                return
+            cycle = list(self._blocked)
+
+        self._abort(
+            DeadlockError(
+                cycle,
+                {
+                    task_id: blocked.resource
+                    for task_id, blocked in self._blocked.items()
+                },
+            )
+        )
+
+    def _check_livelock(self) -> None:
+        """
+        Aborts the iteration after `max_steps` decisions, or after `max_stalls`
+        decisions in a row without progress: made after giving up on tasks of
+        the pool that neither reached a scheduling point nor finished (e.g.
+        spinning or waiting for something the shuffler doesn't know about)
+        """
+        self._steps += 1
+        if self._pending.bit_count() + len(self._blocked) >= self._cur_pool_size:
+            self._stalls = 0
+        else:
+            self._stalls += 1
+
+        if self._max_steps is not None and self._steps > self._max_steps:
+            steps = self._max_steps
+        elif self._max_stalls is not None and self._stalls > self._max_stalls:
+            steps = self._max_stalls
+        else:
+            return
+
+        tasks = self._interner.decode(self._pending) | self._blocked.keys()
+        if self._running is not None:
+            tasks.add(self._running)
+        self._abort(LivelockError(steps, sorted(tasks)))
+
+    def _abort(self, error: RuntimeError) -> None:
+        """
+        Fails the current iteration with `error`: blocked and waiting tasks
+        raise it right away, running ones at their next scheduling point
+        """
+        self._aborted = error
+        for blocked in self._blocked.values():
+            blocked.wake()
+        self._blocked.clear()
+        self._op_finished.set()
+        self._pool_changed.set()
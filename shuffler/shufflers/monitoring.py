@@ -0,0 +1,227 @@
+"""
+Automatic scheduling points for `ThreadingShuffler` via `sys.monitoring`
+(PEP 669): instead of wrapping operations in `shuffler.shuffle(...)` by hand,
+a scheduling point is placed before every attribute/global access or call
+into selected modules within the target code. Events are enabled locally for
+target code objects only, the rest of the program runs without overhead
+"""
+
+from __future__ import annotations
+import dis
+import inspect
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import CodeType, FunctionType, MethodType, ModuleType
+from typing import Any, Callable, ContextManager, Iterable, Iterator, Self
+
+from .protocol import TaskID
+from .threading import ThreadingShuffler
+
+ATTRIBUTE_OPS = frozenset({"LOAD_ATTR", "STORE_ATTR", "DELETE_ATTR"})
+GLOBAL_OPS = frozenset({"STORE_GLOBAL", "DELETE_GLOBAL"})
+
+Target = Callable[..., Any] | ModuleType | CodeType | type
+
+
+def _is_data(value: object) -> bool:
+    return not isinstance(value, ModuleType | type) and not callable(value)
+
+
+def _collect_code(target: Target, seen: set[int]) -> Iterator[CodeType]:
+    match target:
+        case CodeType():
+            if id(target) in seen:
+                return
+            seen.add(id(target))
+            yield target
+            for const in target.co_consts:
+                if isinstance(const, CodeType):
+                    yield from _collect_code(const, seen)
+        case MethodType():
+            yield from _collect_code(target.__func__, seen)
+        case FunctionType():
+            yield from _collect_code(target.__code__, seen)
+        case ModuleType() | type():
+            for value in vars(target).values():
+                func = getattr(value, "__func__", getattr(value, "fget", value))
+                if getattr(func, "__module__", None) != getattr(
+                    target, "__module__", target.__name__
+                ):
+                    continue
+                if isinstance(func, FunctionType) or (
+                    isinstance(func, type) and func is not target
+                ):
+                    yield from _collect_code(func, seen)
+        case _:
+            raise TypeError(f"Can't instrument {target!r}")
+
+
+def _access_offsets(
+    code: CodeType,
+    globals_: dict[str, Any],
+    attributes: bool,
+    global_vars: bool,
+) -> frozenset[int]:
+    offsets = set()
+    prev: dis.Instruction | None = None
+    for instr in dis.get_instructions(code):
+        if instr.opname in ATTRIBUTE_OPS:
+            # Attributes of modules/classes (e.g. `time.sleep`) aren't shared state
+            if attributes and not (
+                prev is not None
+                and prev.opname == "LOAD_GLOBAL"
+                and not _is_data(globals_.get(prev.argval))
+            ):
+                offsets.add(instr.offset)
+        elif global_vars and (
+            instr.opname in GLOBAL_OPS
+            or (
+                instr.opname == "LOAD_GLOBAL"
+                and instr.argval in globals_
+                and _is_data(globals_[instr.argval])
+            )
+        ):
+            offsets.add(instr.offset)
+        prev = instr
+
+    return frozenset(offsets)
+
+
+@dataclass
+class _TaskState:
+    task_id: TaskID
+    op: ContextManager[None] | None = None
+
+
+@dataclass
+class _Scope:
+    offsets: dict[CodeType, frozenset[int]] = field(default_factory=dict)
+    modules: tuple[str, ...] = ()
+
+
+class Monitor:
+    """
+    Instruments `targets` (functions, methods, classes, modules or code
+    objects). Threads taking part in exploration have to be registered with
+    `monitor.task(task_id)`; a task's operation spans from one scheduling point
+    to the next one (or the end of the task)
+    """
+
+    def __init__(
+        self,
+        shuffler: ThreadingShuffler,
+        targets: Iterable[Target],
+        *,
+        attributes: bool = True,
+        global_vars: bool = True,
+        calls_into: Iterable[str | ModuleType] = (),
+    ) -> None:
+        self._shuffler = shuffler
+        self._tasks: dict[int, _TaskState] = {}
+        self._tool_id: int | None = None
+
+        seen: set[int] = set()
+        self._scope = _Scope(
+            modules=tuple(
+                module.__name__ if isinstance(module, ModuleType) else module
+                for module in calls_into
+            )
+        )
+        for target in targets:
+            module = inspect.getmodule(target)
+            globals_ = vars(module) if module is not None else {}
+            for code in _collect_code(target, seen):
+                self._scope.offsets[code] = _access_offsets(
+                    code, globals_, attributes, global_vars
+                )
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        assert self._tool_id is None
+        monitoring = sys.monitoring
+        self._tool_id = next(
+            tool_id
+            for tool_id in (3, 4, 0, 1, 2, 5)
+            if monitoring.get_tool(tool_id) is None
+        )
+        monitoring.use_tool_id(self._tool_id, "shuffler")
+
+        events = monitoring.events.NO_EVENTS
+        if any(self._scope.offsets.values()):
+            events |= monitoring.events.INSTRUCTION
+            monitoring.register_callback(
+                self._tool_id, monitoring.events.INSTRUCTION, self._on_instruction
+            )
+        if self._scope.modules:
+            events |= monitoring.events.CALL
+            monitoring.register_callback(
+                self._tool_id, monitoring.events.CALL, self._on_call
+            )
+
+        for code in self._scope.offsets:
+            monitoring.set_local_events(self._tool_id, code, events)
+
+    def stop(self) -> None:
+        if self._tool_id is None:
+            return
+
+        monitoring = sys.monitoring
+        for code in self._scope.offsets:
+            monitoring.set_local_events(
+                self._tool_id, code, monitoring.events.NO_EVENTS
+            )
+        monitoring.register_callback(self._tool_id, monitoring.events.INSTRUCTION, None)
+        monitoring.register_callback(self._tool_id, monitoring.events.CALL, None)
+        monitoring.free_tool_id(self._tool_id)
+        self._tool_id = None
+
+    @contextmanager
+    def task(self, task_id: TaskID) -> Iterator[None]:
+        ident = threading.get_ident()
+        assert ident not in self._tasks
+        state = self._tasks[ident] = _TaskState(task_id)
+        try:
+            yield
+        finally:
+            del self._tasks[ident]
+            if state.op is not None:
+                state.op.__exit__(None, None, None)
+            self._shuffler.decrement_pool_size()
+
+    def _point(self, state: _TaskState) -> None:
+        if state.op is not None:
+            state.op.__exit__(None, None, None)
+        state.op = self._shuffler.shuffle(state.task_id)
+        state.op.__enter__()
+
+    def _on_instruction(self, code: CodeType, offset: int) -> object:
+        if offset not in self._scope.offsets.get(code, ()):
+            return sys.monitoring.DISABLE
+        if (state := self._tasks.get(threading.get_ident())) is not None:
+            self._point(state)
+        return None
+
+    def _on_call(
+        self,
+        _code: CodeType,
+        _offset: int,
+        callable_: object,
+        _arg0: object,
+    ) -> object:
+        if (state := self._tasks.get(threading.get_ident())) is None:
+            return None
+        module = getattr(callable_, "__module__", None) or ""
+        if any(
+            module == name or module.startswith(f"{name}.")
+            for name in self._scope.modules
+        ):
+            self._point(state)
+        return None
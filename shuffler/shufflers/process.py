@@ -0,0 +1,306 @@
+"""
+Shuffler for tasks living in separate processes. The strategy runs in a
+coordinator thread of the process that created the shuffler, tasks talk to it
+over a Unix socket:
+
+    with ProcessShuffler(pool_size=2, strategy=ExhaustiveStrategy()) as shuffler:
+        while not shuffler.strategy_completed():
+            workers = [Process(target=task, args=(shuffler, ...)) for ...]
+            ...
+            shuffler.finish_sequence()
+
+The shuffler can be passed to child processes (forked or pickled), where
+`shuffle` and `decrement_pool_size` act as clients of the coordinator
+"""
+
+from __future__ import annotations
+import os
+import select
+import selectors
+import socket
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Self
+
+from shuffler.stats import ProgressCallback, Stats, StatsCollector
+from shuffler.strategies import Interner, Strategy
+
+from .protocol import SyncShuffler, TaskID
+
+# Single-byte messages keep a step down to a couple of syscalls per side.
+# SHUFFLE is followed by the length of the task id and the task id itself
+SHUFFLE = b"S"
+DONE = b"D"
+EXIT = b"E"
+GO = b"G"
+_LENGTH = struct.Struct("!H")
+
+
+class _Coordinator:
+    def __init__(
+        self,
+        address: str,
+        pool_size: int,
+        max_wait_for: float,
+        metrics: StatsCollector[TaskID],
+    ) -> None:
+        self._pool_size = pool_size
+        self._cur_pool_size = pool_size
+        self._max_wait_for = max_wait_for
+        self._metrics = metrics
+
+        # Bitmask of interned task IDs, and their connections by bit
+        self._pending = 0
+        self._interner: Interner[TaskID] = Interner()
+        self._conns: dict[int, socket.socket] = {}
+        self._running: socket.socket | None = None
+        self._started_at = 0.0
+        self._changed_at = time.monotonic()
+        self._idle_since = self._changed_at
+
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self._buffers: dict[socket.socket, bytearray] = {}
+        self._selector = selectors.DefaultSelector()
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(address)
+        self._listener.listen()
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._closed = False
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._closed = True
+        self._wakeup_w.send(b"\0")
+        self._thread.join()
+        for key in list(self._selector.get_map().values()):
+            key.fileobj.close()  # type: ignore[union-attr]
+        self._selector.close()
+        self._wakeup_w.close()
+
+    def _serve(self) -> None:
+        while not self._closed:
+            events = self._selector.select(self._timeout())
+            with self.lock:
+                for key, _ in events:
+                    if key.fileobj is self._listener:
+                        self._accept()
+                    elif key.fileobj is not self._wakeup_r:
+                        self._receive(key.fileobj)  # type: ignore[arg-type]
+                self._schedule()
+                self.idle.notify_all()
+
+    def _timeout(self) -> float | None:
+        if self._running is not None or not self._pending:
+            return None
+        return max(0.0, self._changed_at + self._max_wait_for - time.monotonic())
+
+    def _accept(self) -> None:
+        conn, _ = self._listener.accept()
+        self._buffers[conn] = bytearray()
+        self._selector.register(conn, selectors.EVENT_READ)
+
+    def _receive(self, conn: socket.socket) -> None:
+        try:
+            data = conn.recv(4096)
+        except OSError:
+            data = b""
+        if not data:
+            self._disconnect(conn)
+            return
+
+        buffer = self._buffers[conn]
+        buffer += data
+        offset = 0
+        while offset < len(buffer):
+            match buffer[offset : offset + 1]:
+                case b"S":
+                    start = offset + 1 + _LENGTH.size
+                    if len(buffer) < start:
+                        break
+                    (length,) = _LENGTH.unpack_from(buffer, offset + 1)
+                    if len(buffer) < start + length:
+                        break
+                    bit = self._interner.bit(buffer[start : start + length].decode())
+                    self._pending |= bit
+                    self._conns[bit] = conn
+                    self._changed_at = time.monotonic()
+                    offset = start + length
+                case b"D":
+                    self._finish_op()
+                    offset += 1
+                case b"E":
+                    self._cur_pool_size -= 1
+                    assert self._cur_pool_size >= 0
+                    self._changed_at = time.monotonic()
+                    offset += 1
+                case message:
+                    raise ValueError(f"Unexpected message {message!r}")
+        del buffer[:offset]
+
+    def _disconnect(self, conn: socket.socket) -> None:
+        self._selector.unregister(conn)
+        del self._buffers[conn]
+        conn.close()
+        for bit, pending in list(self._conns.items()):
+            if pending is conn:
+                self._pending &= ~bit
+                del self._conns[bit]
+        # A process that died within an operation won't report it finished
+        if self._running is conn:
+            self._finish_op()
+
+    def _finish_op(self) -> None:
+        now = time.monotonic()
+        self._metrics.add_run_time(now - self._started_at)
+        self._running = None
+        self._idle_since = now
+
+    def _schedule(self) -> None:
+        if self._running is not None or not self._pending:
+            return
+
+        now = time.monotonic()
+        if (
+            self._pending.bit_count() < self._cur_pool_size
+            and now - self._changed_at < self._max_wait_for
+        ):
+            return
+
+        self._metrics.add_wait_time(now - self._idle_since)
+        bit = 1 << self._metrics.choose_next_mask(self._pending, self._interner)
+        self._pending ^= bit
+        conn = self._conns.pop(bit)
+        self._running = conn
+        self._started_at = time.monotonic()
+        try:
+            conn.sendall(GO)
+        except OSError:
+            self._disconnect(conn)
+
+    def settled(self) -> bool:
+        """
+        Whether all tasks have exited, or their processes are gone.
+        Messages sent by a finished process may still be in flight otherwise
+        """
+        if self._running is None and self._cur_pool_size <= 0:
+            return True
+        if self._buffers:
+            return False
+        incoming, _, _ = select.select([self._listener], [], [], 0)
+        return not incoming
+
+    def reset(self) -> None:
+        self._cur_pool_size = self._pool_size
+        self._running = None
+        self._changed_at = self._idle_since = time.monotonic()
+
+
+class ProcessShuffler(SyncShuffler):
+    def __init__(
+        self,
+        pool_size: int,
+        strategy: Strategy[TaskID],
+        max_wait_for: float = 0.020,
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 1.0,
+        address: str | None = None,
+    ) -> None:
+        self._strategy = strategy
+        self._metrics = StatsCollector(strategy, progress, progress_interval)
+
+        self._tmpdir: str | None = None
+        if address is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="shuffler-")
+            address = str(Path(self._tmpdir) / "coordinator.sock")
+        self.address = address
+
+        self._coordinator: _Coordinator | None = _Coordinator(
+            address, pool_size, max_wait_for, self._metrics
+        )
+        self._owner_pid = os.getpid()
+        self._local = threading.local()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"address": self.address}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.address = state["address"]
+        self._coordinator = None
+        self._owner_pid = -1
+        self._local = threading.local()
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._get_coordinator().start()
+
+    def stop(self) -> None:
+        self._get_coordinator().stop()
+        if self._tmpdir is not None:
+            Path(self.address).unlink()
+            Path(self._tmpdir).rmdir()
+
+    def _get_coordinator(self) -> _Coordinator:
+        if self._coordinator is None or os.getpid() != self._owner_pid:
+            raise RuntimeError("Only available in the process owning the shuffler")
+        return self._coordinator
+
+    def _connection(self) -> socket.socket:
+        # Forked children inherit the parent's thread-locals
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._local.conn.connect(self.address)
+            self._local.pid = os.getpid()
+        conn: socket.socket = self._local.conn
+        return conn
+
+    @contextmanager
+    def shuffle(self, task_id: TaskID) -> Iterator[None]:
+        conn = self._connection()
+        encoded = task_id.encode()
+        conn.sendall(SHUFFLE + _LENGTH.pack(len(encoded)) + encoded)
+        if conn.recv(1) != GO:
+            raise ConnectionError("Coordinator has gone away")
+        try:
+            yield
+        finally:
+            conn.sendall(DONE)
+
+    def decrement_pool_size(self) -> None:
+        self._connection().sendall(EXIT)
+
+    def finish_sequence(self) -> list[TaskID]:
+        coordinator = self._get_coordinator()
+        with coordinator.lock:
+            coordinator.idle.wait_for(coordinator.settled)
+            coordinator.reset()
+            return self._metrics.finish_sequence()
+
+    def strategy_completed(self) -> bool:
+        return self._strategy.is_completed()
+
+    def reset(self) -> None:
+        coordinator = self._get_coordinator()
+        with coordinator.lock:
+            coordinator.reset()
+            self._strategy.reset()
+            self._metrics.reset()
+
+    @property
+    def stats(self) -> Stats:
+        return self._metrics.stats
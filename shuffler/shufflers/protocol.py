@@ -1,15 +1,43 @@
 from typing import (
+    Any,
     AsyncContextManager,
     ContextManager,
+    Mapping,
     Protocol,
+    Sequence,
     TypeAlias,
 )
 
+from shuffler.stats import Stats
 from shuffler.strategies import Strategy
 
 TaskID: TypeAlias = str
 
 
+class DeadlockError(RuntimeError):
+    def __init__(
+        self,
+        cycle: Sequence[Any],
+        resources: Mapping[Any, object],
+    ) -> None:
+        self.cycle = list(cycle)
+        self.resources = dict(resources)
+        waits = ", ".join(
+            f"{task} waits for {resource!r}" for task, resource in resources.items()
+        )
+        super().__init__(f"Deadlock: {' -> '.join(map(str, self.cycle))} ({waits})")
+
+
+class LivelockError(RuntimeError):
+    def __init__(self, steps: int, tasks: Sequence[Any]) -> None:
+        self.steps = steps
+        self.tasks = list(tasks)
+        super().__init__(
+            f"No progress after {steps} steps, still running: "
+            f"{', '.join(map(str, self.tasks))}"
+        )
+
+
 class SyncShuffler(Protocol):
     def __init__(
         self,
@@ -24,6 +52,9 @@ class SyncShuffler(Protocol):
 
     def strategy_completed(self) -> bool: ...
 
+    @property
+    def stats(self) -> Stats: ...
+
 
 class AsyncShuffler(Protocol):
     def __init__(
@@ -38,3 +69,6 @@ class AsyncShuffler(Protocol):
     def finish_sequence(self) -> list[TaskID]: ...
 
     def strategy_completed(self) -> bool: ...
+
+    @property
+    def stats(self) -> Stats: ...
@@ -1,44 +1,136 @@
 from __future__ import annotations
+import _thread
 import threading
 import time
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Callable, Generic, Iterator, TypeVar
 
-from shuffler.strategies import Strategy
+from shuffler.linearizability import History
+from shuffler.stats import ProgressCallback, Stats, StatsCollector
+from shuffler.strategies import Access, Interner, Strategy
 
+from .blocking import Blocked, BlockingShuffler
 from .protocol import SyncShuffler, TaskID
 
+R = TypeVar("R")
 
-class ThreadingShuffler(SyncShuffler):
+
+class TaskHandle(Generic[R]):
+    """
+    Outcome of a task started by `ThreadingShuffler.spawn`. Built on low-level
+    locks, so that it keeps working with `threading` primitives patched
+    """
+
+    def __init__(self) -> None:
+        self._done = _thread.allocate_lock()
+        self._done.acquire()
+        self._result: R | None = None
+        self._error: BaseException | None = None
+
+    def join(self) -> None:
+        with self._done:
+            pass
+
+    def exception(self) -> BaseException | None:
+        self.join()
+        return self._error
+
+    def result(self) -> R:
+        if (error := self.exception()) is not None:
+            raise error
+        return self._result  # type: ignore[return-value]
+
+
+class ThreadingShuffler(BlockingShuffler, SyncShuffler):
     def __init__(
         self,
         pool_size: int,
         strategy: Strategy[TaskID],
         max_wait_for: float = 0.020,
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 1.0,
+        history: History | None = None,
+        max_steps: int | None = None,
+        max_stalls: int | None = 100,
     ) -> None:
-        self._pending: set[TaskID] = set()
+        # Bitmask of interned task IDs, updated under `_state_lock`
+        self._pending = 0
+        self._interner: Interner[TaskID] = Interner()
         self._strategy = strategy
+        self._metrics = StatsCollector(strategy, progress, progress_interval)
+        # Duck-typed strategies lack `Strategy.declare_access`
+        self._declare_access = getattr(strategy, "declare_access", None)
 
-        self._op_finished = threading.Event()
-        self._pool_changed = threading.Event()
+        self._op_finished: threading.Event = threading.Event()
+        self._pool_changed: threading.Event = threading.Event()
         self._pool_size = pool_size
         self._cur_pool_size = pool_size
         self._max_wait_for = max_wait_for
+        # Scheduling decisions per iteration before it's aborted as a livelock
+        self._max_steps = max_steps
+        self._steps = 0
+        # Decisions in a row made after `max_wait_for` expired with tasks of the
+        # pool missing, and none finishing, before it's aborted as a livelock
+        self._max_stalls = max_stalls
+        self._stalls = 0
+
+        # Calls recorded by the history are attributed to the current task
+        self._history = history
+        if history is not None:
+            history.current_task = self.current_task
+
+        # Low-level locks are immune to patching of `threading` primitives
+        self._state_lock = _thread.allocate_lock()
+        self._blocked: dict[TaskID, Blocked] = {}
+        self._threads: dict[int, TaskID] = {}
+        self._running: TaskID | None = None
+        # Error the current iteration was aborted with
+        self._aborted: RuntimeError | None = None
+        # Tasks started by `spawn`/`run_tasks` in the current iteration
+        self._spawned: list[TaskHandle[Any]] = []
 
         self._op_finished.set()
 
+    def current_task(self) -> TaskID | None:
+        return self._threads.get(threading.get_ident())
+
     @contextmanager
-    def shuffle(self, task_id: TaskID) -> Iterator[None]:
-        self._pending.add(task_id)
+    def shuffle(self, task_id: TaskID, access: Access | None = None) -> Iterator[None]:
+        """
+        Runs the body as an op of `task_id` once scheduled. `access` declares
+        the resource it touches, ops of independent accesses may be reordered
+        freely (see `ExhaustiveStrategy`)
+        """
+        self._threads[threading.get_ident()] = task_id
+        with self._state_lock:
+            bit = self._interner.bit(task_id)
+            if self._declare_access is not None:
+                self._declare_access(task_id, access)
+            self._pending |= bit
         self._pool_changed.set()
+        self._wait_turn(bit)
 
+        self._running = task_id
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._running = None
+            self._metrics.add_run_time(time.monotonic() - started_at)
+            self._op_finished.set()
+
+    def _wait_turn(self, bit: int) -> None:
         while True:
             elapsed = 0.0
             started_at = time.monotonic()
             while elapsed < self._max_wait_for:
+                if self._aborted is not None:
+                    raise self._aborted
                 if (
-                    task_id not in self._pending
-                    or len(self._pending) >= self._cur_pool_size
+                    not self._pending & bit
+                    # Blocked tasks won't reach a scheduling point by themselves
+                    or self._pending.bit_count() + len(self._blocked)
+                    >= self._cur_pool_size
                 ):
                     break
 
@@ -46,36 +138,187 @@ class ThreadingShuffler(SyncShuffler):
                 self._pool_changed.wait(timeout=self._max_wait_for - elapsed)
                 elapsed = time.monotonic() - started_at
 
-            if task_id not in self._pending:
+            if not self._pending & bit:
                 break
 
+            self._metrics.add_wait_time(elapsed)
             self._op_finished.wait()
             self._op_finished.clear()
-            to_release = self._strategy.choose_next(self._pending)
-            self._pending.remove(to_release)
+            with self._state_lock:
+                self._check_livelock()
+                if self._aborted is not None:
+                    # Lets other tasks waiting for their turn see the error
+                    self._op_finished.set()
+                    raise self._aborted
+                to_release = self._metrics.choose_next_mask(
+                    self._pending, self._interner
+                )
+                self._pending ^= 1 << to_release
             self._pool_changed.set()
 
-            if task_id not in self._pending:
+            if not self._pending & bit:
                 break
 
-        try:
-            yield
-        finally:
+    def wait_blocked(
+        self,
+        resource: object,
+        timeout: float | None = None,
+        owner: TaskID | None = None,
+        unless: Callable[[], bool] | None = None,
+    ) -> bool:
+        """
+        Parks the current task until `resource` is signalled by `notify_blocked`,
+        then waits for the task to be scheduled again. An operation in progress
+        is suspended meanwhile. Returns False if `timeout` expired.
+        `unless` is called once the task is registered as blocked, so that
+        notifications can't be missed between a failed attempt to get the
+        resource (or a release of another one) and parking: the task isn't
+        parked if it returns True
+        """
+        task_id = self.current_task()
+        assert task_id is not None
+        wakeup = _thread.allocate_lock()
+        wakeup.acquire()
+        blocked = Blocked(
+            resource,
+            wakeup.release,
+            owner,
+            timed=timeout is not None,
+            parked=unless is None,
+        )
+
+        if unless is None:
+            with self._state_lock:
+                in_op = self._park(task_id, blocked)
+        else:
+            with self._state_lock:
+                self._blocked[task_id] = blocked
+            got_resource = unless()
+            with self._state_lock:
+                if got_resource and self._blocked.get(task_id) is blocked:
+                    del self._blocked[task_id]
+                    return True
+                # Possibly notified meanwhile, `wakeup` is released then
+                blocked.parked = True
+                in_op = self._suspend(task_id)
+        self._pool_changed.set()
+
+        notified = wakeup.acquire(timeout=-1 if timeout is None else timeout)
+        if not notified:
+            with self._state_lock:
+                if self._blocked.pop(task_id, None) is not None:
+                    self._pending |= self._interner.bit(task_id)
+                else:
+                    notified = True
+            self._pool_changed.set()
+
+        if self._aborted is not None:
+            raise self._aborted
+
+        self._wait_turn(self._interner.bit(task_id))
+        if in_op:
+            self._running = task_id
+        else:
             self._op_finished.set()
+        return notified
+
+    def notify_blocked(self, resource: object, n: int | None = None) -> int:
+        """Makes (up to `n`) tasks blocked on `resource` runnable again"""
+        with self._state_lock:
+            return super().notify_blocked(resource, n)
 
     def decrement_pool_size(self) -> None:
-        self._cur_pool_size -= 1
-        assert self._cur_pool_size >= 0
+        with self._state_lock:
+            self._cur_pool_size -= 1
+            assert self._cur_pool_size >= 0
+            # A finished task is progress
+            self._stalls = 0
+            self._check_deadlock()
         self._pool_changed.set()
 
+    def spawn(self, fn: Callable[[], R]) -> TaskHandle[R]:
+        """
+        Runs `fn` in a new thread counted in the pool until it returns, so
+        that it doesn't need to call `decrement_pool_size`
+        """
+        with self._state_lock:
+            self._cur_pool_size += 1
+        self._pool_changed.set()
+        return self._start(fn)
+
+    def run_tasks(
+        self, *tasks: Callable[[], Any], return_exceptions: bool = False
+    ) -> list[Any]:
+        """
+        Runs an iteration of `tasks` (the pool size given to the shuffler is
+        ignored), each in a thread of its own, and waits for them and for the
+        tasks they spawn. Returns their results, raises the first error unless
+        `return_exceptions`
+        """
+        with self._state_lock:
+            self._cur_pool_size = len(tasks)
+        handles = [self._start(task) for task in tasks]
+        # Spawned tasks may spawn more meanwhile
+        ix = 0
+        while ix < len(self._spawned):
+            self._spawned[ix].join()
+            ix += 1
+
+        results = []
+        for handle in handles:
+            if (error := handle.exception()) is None:
+                results.append(handle.result())
+            elif return_exceptions:
+                results.append(error)
+            else:
+                raise error
+        return results
+
+    def _start(self, fn: Callable[[], R]) -> TaskHandle[R]:
+        handle: TaskHandle[R] = TaskHandle()
+
+        def run() -> None:
+            try:
+                handle._result = fn()
+            except BaseException as e:
+                handle._error = e
+            finally:
+                # The task leaves the pool before anyone can see it finished
+                self.decrement_pool_size()
+                handle._done.release()
+
+        self._spawned.append(handle)
+        _thread.start_new_thread(run, ())
+        return handle
+
     def finish_sequence(self) -> list[TaskID]:
         self._cur_pool_size = self._pool_size
-        return self._strategy.finish_sequence()
+        self._threads.clear()
+        self._blocked.clear()
+        self._spawned.clear()
+        self._pending = self._steps = self._stalls = 0
+        self._running = self._aborted = None
+        self._op_finished.set()
+        if self._history is not None:
+            self._history.clear()
+        return self._metrics.finish_sequence()
 
     def strategy_completed(self) -> bool:
         return self._strategy.is_completed()
 
     def reset(self) -> None:
         self._cur_pool_size = self._pool_size
+        self._threads.clear()
+        self._blocked.clear()
+        self._spawned.clear()
+        self._pending = self._steps = self._stalls = 0
+        self._running = self._aborted = None
         self._op_finished.set()
+        if self._history is not None:
+            self._history.clear()
         self._strategy.reset()
+        self._metrics.reset()
+
+    @property
+    def stats(self) -> Stats:
+        return self._metrics.stats
@@ -0,0 +1,142 @@
+from __future__ import annotations
+import time
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Callable, Generic, TypeAlias
+
+from shuffler.strategies.protocol import Interner, Strategy, T
+
+
+@dataclass
+class Stats:
+    iterations: int = 0
+    steps: int = 0
+    estimated_total: int | None = None
+    # Time spent waiting for the pool to fill up before a decision (`max_wait_for`)
+    wait_time: float = 0.0
+    # Time spent executing user code between/inside scheduling points
+    run_time: float = 0.0
+    # Time spent inside `Strategy.choose_next`
+    decision_time: float = 0.0
+    tree_nodes: int = 0
+    tree_memory: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def progress(self) -> float | None:
+        if not self.estimated_total:
+            return None
+        return min(self.iterations / self.estimated_total, 1.0)
+
+    @property
+    def eta(self) -> float | None:
+        if (progress := self.progress) is None or not self.iterations:
+            return None
+        return self.elapsed / progress - self.elapsed
+
+
+ProgressCallback: TypeAlias = Callable[[Stats], None]
+
+
+class StatsCollector(Generic[T]):
+    """
+    Wraps a strategy, timing decisions and counting steps/iterations.
+    With `infer_run_time`, run time of an iteration is its wall time minus
+    waiting and decision time (for plugins that can't see op boundaries).
+    Progress is reported at the end of an iteration or at a decision, once
+    `progress_interval` has passed since the last report
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy[T],
+        progress: ProgressCallback | None = None,
+        progress_interval: float = 1.0,
+        infer_run_time: bool = False,
+    ) -> None:
+        self._strategy = strategy
+        self._progress = progress
+        self._progress_interval = progress_interval
+        self._infer_run_time = infer_run_time
+        # Duck-typed strategies lack the default methods of `Strategy`
+        self._choose_next_mask: Callable[[int, Interner[T]], int] = getattr(
+            strategy, "choose_next_mask", partial(Strategy.choose_next_mask, strategy)
+        )
+        self.reset()
+
+    def reset(self) -> None:
+        self._stats = Stats()
+        self._started_at = time.monotonic()
+        self._reported_at = self._started_at
+        self._iteration_started_at: float | None = None
+        self._iteration_overhead = 0.0
+
+    @property
+    def stats(self) -> Stats:
+        stats = self._stats
+        stats.estimated_total = self._query("estimated_total")
+        stats.tree_nodes = self._query("tree_size") or 0
+        stats.tree_memory = self._query("memory_usage") or 0
+        stats.elapsed = time.monotonic() - self._started_at
+        return replace(stats)
+
+    def _query(self, name: str) -> int | None:
+        # Duck-typed strategies may not implement the optional methods
+        method = getattr(self._strategy, name, None)
+        return None if method is None else method()
+
+    def choose_next(self, options: set[T]) -> T:
+        started_at = self._start_decision()
+        selected = self._strategy.choose_next(options)
+        self._finish_decision(started_at)
+        return selected
+
+    def choose_next_mask(self, mask: int, interner: Interner[T]) -> int:
+        started_at = self._start_decision()
+        selected = self._choose_next_mask(mask, interner)
+        self._finish_decision(started_at)
+        return selected
+
+    def _start_decision(self) -> float:
+        started_at = time.monotonic()
+        if self._iteration_started_at is None:
+            self._iteration_started_at = started_at
+        return started_at
+
+    def _finish_decision(self, started_at: float) -> None:
+        now = time.monotonic()
+        elapsed = now - started_at
+        self._stats.decision_time += elapsed
+        self._iteration_overhead += elapsed
+        self._stats.steps += 1
+        # Long iterations are reported on as they go
+        self._report(now)
+
+    def _report(self, now: float) -> None:
+        if (
+            self._progress is not None
+            and now - self._reported_at >= self._progress_interval
+        ):
+            self._reported_at = now
+            self._progress(self.stats)
+
+    def add_wait_time(self, elapsed: float) -> None:
+        self._stats.wait_time += elapsed
+        self._iteration_overhead += elapsed
+
+    def add_run_time(self, elapsed: float) -> None:
+        self._stats.run_time += elapsed
+
+    def finish_sequence(self) -> list[T]:
+        now = time.monotonic()
+        if self._infer_run_time and self._iteration_started_at is not None:
+            self._stats.run_time += max(
+                now - self._iteration_started_at - self._iteration_overhead, 0.0
+            )
+        self._iteration_started_at = None
+        self._iteration_overhead = 0.0
+
+        sequence = self._strategy.finish_sequence()
+        self._stats.iterations += 1
+        self._report(now)
+        return sequence
@@ -1,9 +1,43 @@
-from .exhaustive import ExhaustiveStrategy
-from .protocol import Strategy
-from .random import RandomStrategy
+from typing import TYPE_CHECKING
+
+from shuffler.util import lazy_import
+
+if TYPE_CHECKING:
+    from .corpus import CorpusStrategy
+    from .estimating import Estimate, EstimatingStrategy
+    from .exhaustive import ExhaustiveStrategy
+    from .protocol import Access, Interner, Strategy, independent
+    from .random import RandomStrategy
+    from .random_walk import RandomWalkStrategy
+    from .replay import ReplayStrategy
 
 __all__ = [
     "Strategy",
+    "Interner",
+    "Access",
+    "independent",
     "ExhaustiveStrategy",
     "RandomStrategy",
+    "RandomWalkStrategy",
+    "ReplayStrategy",
+    "EstimatingStrategy",
+    "Estimate",
+    "CorpusStrategy",
 ]
+
+__getattr__, __dir__ = lazy_import(
+    __name__,
+    attributes={
+        "Strategy": ".protocol",
+        "Interner": ".protocol",
+        "Access": ".protocol",
+        "independent": ".protocol",
+        "ExhaustiveStrategy": ".exhaustive",
+        "RandomStrategy": ".random",
+        "RandomWalkStrategy": ".random_walk",
+        "ReplayStrategy": ".replay",
+        "EstimatingStrategy": ".estimating",
+        "Estimate": ".estimating",
+        "CorpusStrategy": ".corpus",
+    },
+)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from shuffler.corpus import ROOT, Corpus, extend_hash
+
+from .protocol import Interner, Strategy, T
+from .random import RandomStrategy
+
+
+class CorpusStrategy(RandomStrategy[T]):
+    """
+    Random exploration steered by a `Corpus` of earlier runs: options leading
+    to exhausted prefixes (all of whose schedules passed before) are skipped,
+    and among the rest, those leading to prefixes that weren't recorded yet
+    are preferred. Completed once the whole corpus is exhausted, so verified
+    schedules aren't repeated. The pytest plugin attaches its corpus if none
+    is given
+    """
+
+    def __init__(self, corpus: Corpus | None = None, max_iterations: int = 100) -> None:
+        super().__init__(max_iterations)
+        self.corpus = corpus
+        # Iterations that ended up with a schedule verified before
+        self.repeated = 0
+
+        self._prefix_hash = ROOT
+
+    def choose_next(self, options: set[T]) -> T:
+        assert options
+        candidates = sorted(options)
+        if self.corpus is None:
+            selected = self._rand.choice(candidates)
+            self._curr_path.append(selected)
+            return selected
+
+        corpus = self.corpus
+        children = {
+            option: extend_hash(self._prefix_hash, option) for option in candidates
+        }
+        corpus.branch(self._prefix_hash, list(children.values()))
+        # All exhausted only when options differ between runs of the same prefix
+        candidates = [
+            option for option in candidates if children[option] not in corpus.exhausted
+        ] or candidates
+        if len(self._curr_path) < corpus.prefix_depth:
+            unexplored = [
+                option
+                for option in candidates
+                if children[option] not in corpus.prefixes
+            ]
+            candidates = unexplored or candidates
+
+        selected = self._rand.choice(candidates)
+        self._prefix_hash = children[selected]
+        self._curr_path.append(selected)
+        return selected
+
+    def choose_next_mask(self, mask: int, interner: Interner[T]) -> int:
+        # Prefix hashes are computed over decoded options anyway
+        return Strategy.choose_next_mask(self, mask, interner)
+
+    def finish_sequence(self) -> list[T]:
+        path = super().finish_sequence()
+        if self.corpus is not None and self.corpus.is_verified(path):
+            self.repeated += 1
+        self._prefix_hash = ROOT
+        return path
+
+    def is_completed(self) -> bool:
+        return super().is_completed() or (
+            self.corpus is not None and ROOT in self.corpus.exhausted
+        )
+
+    def reset(self) -> None:
+        super().reset()
+        self.repeated = 0
+        self._prefix_hash = ROOT
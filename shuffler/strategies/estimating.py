@@ -0,0 +1,109 @@
+from __future__ import annotations
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from random import Random
+from typing import Any
+
+from .exhaustive import ExhaustiveStrategy
+from .protocol import Strategy, T
+from .random import RandomStrategy
+
+
+@dataclass(frozen=True)
+class Estimate:
+    # Expected number of sequences `ExhaustiveStrategy` would explore
+    schedules: float
+    # Standard error of `schedules`
+    stderr: float
+    # Mean wall time of a single iteration, in seconds
+    iteration_time: float
+    probes: int
+
+    @property
+    def duration(self) -> float:
+        return self.schedules * self.iteration_time
+
+    def fits(self, budget: float) -> bool:
+        return self.duration <= budget
+
+    def strategy(self, budget: float) -> Strategy[Any]:
+        """Exhaustive search if it fits into `budget` seconds, random otherwise"""
+        if self.fits(budget):
+            return ExhaustiveStrategy()
+
+        max_iterations = int(budget / self.iteration_time) if self.iteration_time else 1
+        return RandomStrategy(max_iterations=max(max_iterations, 1))
+
+
+class EstimatingStrategy(Strategy[T]):
+    """
+    Knuth's random-probe estimation of the exploration tree size: each probe
+    is a uniformly random path, the product of branching factors along it is
+    an unbiased estimate of the number of leaves (i.e. exhaustive sequences).
+    Unlike `util.n_interleavings`, accounts for data-dependent control flow
+    """
+
+    def __init__(self, n_probes: int = 10) -> None:
+        self.n_probes = n_probes
+
+        self._rand = Random()
+        self._curr_path: list[T] = []
+        self._curr_product = 1
+        self._products: list[int] = []
+        self._durations: list[float] = []
+        self._started_at: float | None = None
+
+    def seed(self, state: float | str | bytes) -> None:
+        self._rand.seed(state)
+
+    def choose_next(self, options: set[T]) -> T:
+        assert options
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+
+        selected = self._rand.choice(sorted(options))
+        self._curr_product *= len(options)
+        self._curr_path.append(selected)
+        return selected
+
+    def finish_sequence(self) -> list[T]:
+        now = time.monotonic()
+        if self._started_at is not None:
+            self._durations.append(now - self._started_at)
+        # Next iteration's setup counts towards its duration
+        self._started_at = now
+
+        self._products.append(self._curr_product)
+        self._curr_product = 1
+        path, self._curr_path = self._curr_path, []
+        return path
+
+    def is_completed(self) -> bool:
+        return len(self._products) >= self.n_probes
+
+    def reset(self) -> None:
+        self._curr_path = []
+        self._curr_product = 1
+        self._products = []
+        self._durations = []
+        self._started_at = None
+
+    def estimate(self) -> Estimate:
+        assert self._products, "No probes finished yet"
+        n_probes = len(self._products)
+        stderr = (
+            statistics.stdev(self._products) / math.sqrt(n_probes)
+            if n_probes > 1
+            else math.inf
+        )
+        return Estimate(
+            schedules=statistics.fmean(self._products),
+            stderr=stderr,
+            iteration_time=statistics.fmean(self._durations or [0.0]),
+            probes=n_probes,
+        )
+
+    def estimated_total(self) -> int | None:
+        return self.n_probes
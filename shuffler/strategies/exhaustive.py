@@ -1,8 +1,10 @@
 from __future__ import annotations
+import math
+import sys
 from dataclasses import dataclass, field
 from typing import Generic
 
-from .protocol import Strategy, T
+from .protocol import Access, Interner, Strategy, T, independent
 
 
 @dataclass
@@ -12,6 +14,11 @@ class Node(Generic[T]):
     parent: Node[T] | None = None
     visited: bool = False
     explored: bool = False
+    # Sleep set: tasks whose next ops commute with the path since a sibling
+    # subtree starting with them, so choosing them here only swaps those ops
+    sleep: dict[T, Access | None] = field(default_factory=dict)
+    # Every continuation is covered elsewhere, a single path is followed
+    redundant: bool = False
 
     def add_child(self, child: Node[T]) -> None:
         child.parent = self
@@ -28,22 +35,84 @@ class Node(Generic[T]):
         return hash(self.value)
 
 
+def _node_size() -> int:
+    node: Node[int] = Node(None)
+    return (
+        sys.getsizeof(node)
+        + sys.getsizeof(vars(node))
+        + sys.getsizeof([])
+        + sys.getsizeof({})
+    )
+
+
+NODE_SIZE = _node_size()
+
+
 class ExhaustiveStrategy(Strategy[T]):
+    """
+    Depth-first search of the exploration tree. With accesses declared by
+    `shuffle(task_id, access)`, keeps sleep sets (Godefroid), so orderings that
+    only swap adjacent independent ops of an explored one aren't explored
+    """
+
     def __init__(self) -> None:
         self._root: Node[T] = Node(None)
+        self._accesses: dict[T, Access | None] = {}
         self._curr_node = self._root
         self._curr_path: list[Node[T]] = []
+        self._n_nodes = 0
+        self._n_sequences = 0
+        self._estimates_sum = 0
 
     def choose_next(self, options: set[T]) -> T:
         assert options
-        selected = None
+        if self._curr_node.children:
+            assert len(options) >= len(self._curr_node.children)
+        else:
+            self._expand(options)
 
+        selected = self._select()
+        assert selected in options
+        return selected
+
+    def choose_next_mask(self, mask: int, interner: Interner[T]) -> int:
+        assert mask
         if self._curr_node.children:
-            assert len(options) == len(self._curr_node.children)
+            assert mask.bit_count() >= len(self._curr_node.children)
         else:
-            for option in sorted(options):
-                self._curr_node.add_child(Node(option))
+            # Options are only decoded when the tree grows
+            self._expand(interner.decode(mask))
+
+        index = interner.indices[self._select()]
+        assert mask >> index & 1
+        return index
 
+    def declare_access(self, task_id: T, access: Access | None) -> None:
+        self._accesses[task_id] = access
+
+    def _expand(self, options: set[T]) -> None:
+        node = self._curr_node
+        awake = [option for option in sorted(options) if option not in node.sleep]
+        if node.redundant or not awake:
+            node.add_child(Node(min(options), redundant=True))
+            self._n_nodes += 1
+            return
+
+        # Children explored before a child are asleep in its subtree
+        explored = dict(node.sleep)
+        for option in awake:
+            access = self._accesses.get(option)
+            sleep = {
+                task_id: other
+                for task_id, other in explored.items()
+                if independent(access, other)
+            }
+            node.add_child(Node(option, sleep=sleep))
+            explored[option] = access
+        self._n_nodes += len(awake)
+
+    def _select(self) -> T:
+        selected = None
         for node in self._curr_node.children:
             if not node.visited:
                 selected = node
@@ -62,7 +131,6 @@ class ExhaustiveStrategy(Strategy[T]):
         selected.visited = True
 
         assert selected.value is not None
-        assert selected.value in options
         return selected.value
 
     def is_completed(self) -> bool:
@@ -70,8 +138,7 @@ class ExhaustiveStrategy(Strategy[T]):
             child.explored for child in self._root.children
         )
 
-    def finish_sequence(self) -> list[T]:
-        node = self._curr_node
+    def _propagate_explored(self, node: Node[T]) -> None:
         while True:
             if all(child.explored for child in node.children):
                 node.explored = True
@@ -81,10 +148,58 @@ class ExhaustiveStrategy(Strategy[T]):
 
             node = node.parent
 
+    def _first_branching(self) -> Node[T]:
+        node = self._root
+        while len(node.children) == 1:
+            node = node.children[0]
+        return node
+
+    def n_shards(self) -> int:
+        """Number of subtrees of the first branching node found so far"""
+        return max(len(self._first_branching().children), 1)
+
+    def shard(self, index: int, count: int) -> None:
+        """
+        Restricts exploration to every `count`-th subtree of the first
+        branching node, so that the search can be split across workers
+        """
+        assert 0 <= index < count
+        node = self._first_branching()
+        for ix, child in enumerate(node.children):
+            if ix % count != index:
+                child.visited = child.explored = True
+        self._propagate_explored(node)
+
+    def finish_sequence(self) -> list[T]:
+        self._propagate_explored(self._curr_node)
+
         path, self._curr_path = self._curr_path, []
         self._curr_node = self._root
+        self._accesses.clear()
+        self._n_sequences += 1
+        # Knuth's estimate: product of branching factors along the path
+        self._estimates_sum += math.prod(
+            len(node.parent.children) for node in path if node.parent is not None
+        )
         return [node.value for node in path if node.value is not None]
 
     def reset(self) -> None:
         self._curr_node = self._root = Node(None)
         self._curr_path = []
+        self._accesses.clear()
+        self._n_nodes = 0
+        self._n_sequences = 0
+        self._estimates_sum = 0
+
+    def estimated_total(self) -> int | None:
+        if self.is_completed():
+            return self._n_sequences
+        if not self._n_sequences:
+            return None
+        return max(round(self._estimates_sum / self._n_sequences), self._n_sequences)
+
+    def tree_size(self) -> int:
+        return self._n_nodes
+
+    def memory_usage(self) -> int:
+        return self._n_nodes * NODE_SIZE
@@ -1,4 +1,6 @@
-from typing import Any, Hashable, Protocol, TypeVar
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Generic, Hashable, Protocol, TypeVar
 
 
 class HashableComparable(Hashable, Protocol):
@@ -8,11 +10,84 @@ class HashableComparable(Hashable, Protocol):
 T = TypeVar("T", bound=HashableComparable)
 
 
+class Interner(Generic[T]):
+    """
+    Maps task IDs to small ints (in order of appearance), so that a set of
+    tasks fits into an int bitmask with the bit `1 << index` per task
+    """
+
+    def __init__(self) -> None:
+        self.ids: list[T] = []
+        self.indices: dict[T, int] = {}
+        self._bits: dict[T, int] = {}
+
+    def bit(self, task_id: T) -> int:
+        try:
+            return self._bits[task_id]
+        except KeyError:
+            self.indices[task_id] = len(self.ids)
+            self._bits[task_id] = bit = 1 << len(self.ids)
+            self.ids.append(task_id)
+            return bit
+
+    def decode(self, mask: int) -> set[T]:
+        return {task_id for task_id, bit in self._bits.items() if mask & bit}
+
+
+@dataclass(frozen=True)
+class Access:
+    """Resource accessed by an op, declared with `shuffle(task_id, access)`"""
+
+    key: Hashable
+    write: bool = False
+
+
+def independent(first: Access | None, second: Access | None) -> bool:
+    """
+    Whether two ops commute: both declared, and either of different resources
+    or both reads. Ops without a declared access depend on every other op
+    """
+    if first is None or second is None:
+        return False
+    return first.key != second.key or not (first.write or second.write)
+
+
 class Strategy(Protocol[T]):
     def choose_next(self, options: set[T]) -> T: ...
 
+    def choose_next_mask(self, mask: int, interner: Interner[T]) -> int:
+        """
+        `choose_next` for options given as a bitmask of interned task IDs,
+        returns the index of the selected one. Strategies override it to avoid
+        building sets at every step
+        """
+        return interner.indices[self.choose_next(interner.decode(mask))]
+
+    def declare_access(
+        self,
+        task_id: T,  # noqa: ARG002
+        access: Access | None,  # noqa: ARG002
+    ) -> None:
+        """
+        Called by shufflers as `task_id` reaches a scheduling point, with the
+        access of the op it's about to run
+        """
+        return None
+
     def finish_sequence(self) -> list[T]: ...
 
     def is_completed(self) -> bool: ...
 
     def reset(self) -> None: ...
+
+    def estimated_total(self) -> int | None:
+        """Expected number of sequences to be explored, if known"""
+        return None
+
+    def tree_size(self) -> int:
+        """Number of nodes in the exploration tree kept by the strategy"""
+        return 0
+
+    def memory_usage(self) -> int:
+        """Approximate memory (in bytes) held by the exploration state"""
+        return 0
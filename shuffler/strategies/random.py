@@ -1,6 +1,6 @@
 from random import Random
 
-from .protocol import Strategy, T
+from .protocol import Interner, Strategy, T
 
 
 class RandomStrategy(Strategy[T]):
@@ -20,6 +20,17 @@ class RandomStrategy(Strategy[T]):
         self._curr_path.append(selected)
         return selected
 
+    def choose_next_mask(self, mask: int, interner: Interner[T]) -> int:
+        assert mask
+        # Drops the lowest set bits until the selected one is the lowest
+        skip = self._rand.randrange(mask.bit_count())
+        while skip:
+            mask &= mask - 1
+            skip -= 1
+        index = (mask & -mask).bit_length() - 1
+        self._curr_path.append(interner.ids[index])
+        return index
+
     def finish_sequence(self) -> list[T]:
         self._counter += 1
         path, self._curr_path = self._curr_path, []
@@ -31,3 +42,6 @@ class RandomStrategy(Strategy[T]):
     def reset(self) -> None:
         self._counter = 0
         self._curr_path = []
+
+    def estimated_total(self) -> int | None:
+        return self.max_iterations
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import sys
+from typing import Generic
+
+from .protocol import Interner, T
+from .random import RandomStrategy
+
+
+class Node(Generic[T]):
+    # A node per explored prefix, children are only added once chosen
+    __slots__ = ("children", "n_options", "complete")
+
+    def __init__(self) -> None:
+        self.children: dict[T, Node[T]] | None = None
+        self.n_options = 0
+        # Every schedule starting with the prefix has been explored
+        self.complete = False
+
+
+NODE_SIZE = sys.getsizeof(Node()) + sys.getsizeof({})
+
+
+class RandomWalkStrategy(RandomStrategy[T]):
+    """
+    Random exploration without repeats: explored prefixes are kept in a tree,
+    options are chosen at random among those whose subtrees aren't complete
+    yet, and the exploration is completed once the root is (or after
+    `max_iterations`). Small spaces are thus explored exhaustively, each
+    schedule once
+    """
+
+    def __init__(self, max_iterations: int = 100) -> None:
+        super().__init__(max_iterations)
+        self._root: Node[T] = Node()
+        self._nodes = [self._root]
+        self._n_nodes = 1
+
+    def choose_next(self, options: set[T]) -> T:
+        assert options
+        selected = self._walk(sorted(options))
+        self._curr_path.append(selected)
+        return selected
+
+    def choose_next_mask(self, mask: int, interner: Interner[T]) -> int:
+        assert mask
+        options = []
+        while mask:
+            lowest = mask & -mask
+            options.append(interner.ids[lowest.bit_length() - 1])
+            mask ^= lowest
+
+        selected = self._walk(options)
+        self._curr_path.append(selected)
+        return interner.indices[selected]
+
+    def _walk(self, options: list[T]) -> T:
+        node = self._nodes[-1]
+        node.n_options = len(options)
+        if node.children is None:
+            node.children = {}
+        children = node.children
+
+        candidates = [
+            option
+            for option in options
+            if option not in children or not children[option].complete
+        ]
+        # Only when options differ between runs of the same prefix
+        selected = self._rand.choice(candidates or options)
+        if (child := children.get(selected)) is None:
+            child = children[selected] = Node()
+            self._n_nodes += 1
+        self._nodes.append(child)
+        return selected
+
+    def finish_sequence(self) -> list[T]:
+        for node in reversed(self._nodes):
+            if node.children is not None and (
+                sum(child.complete for child in node.children.values()) < node.n_options
+            ):
+                break
+            node.complete = True
+
+        self._nodes = [self._root]
+        return super().finish_sequence()
+
+    def is_completed(self) -> bool:
+        return self._root.complete or super().is_completed()
+
+    def reset(self) -> None:
+        super().reset()
+        self._root = Node()
+        self._nodes = [self._root]
+        self._n_nodes = 1
+
+    def estimated_total(self) -> int | None:
+        if self._root.complete:
+            return self._counter
+        return self.max_iterations
+
+    def tree_size(self) -> int:
+        return self._n_nodes
+
+    def memory_usage(self) -> int:
+        return self._n_nodes * NODE_SIZE
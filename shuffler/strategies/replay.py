@@ -0,0 +1,51 @@
+from typing import Sequence
+
+from .protocol import Strategy, T
+
+
+class ReplayStrategy(Strategy[T]):
+    """
+    Follows a recorded sequence once. Diverging options (e.g. when the code
+    under test changed) fall back to the smallest one, `diverged_at` is the
+    first step that didn't follow the sequence
+    """
+
+    def __init__(self, sequence: Sequence[T]) -> None:
+        self.sequence = list(sequence)
+
+        self.diverged_at: int | None = None
+
+        self._curr_path: list[T] = []
+        self._completed = False
+
+    def choose_next(self, options: set[T]) -> T:
+        assert options
+        ix = len(self._curr_path)
+        if ix < len(self.sequence) and self.sequence[ix] in options:
+            selected = self.sequence[ix]
+        else:
+            selected = min(options)
+            if self.diverged_at is None:
+                self.diverged_at = ix
+
+        self._curr_path.append(selected)
+        return selected
+
+    def finish_sequence(self) -> list[T]:
+        # Shorter than the sequence
+        if self.diverged_at is None and len(self._curr_path) < len(self.sequence):
+            self.diverged_at = len(self._curr_path)
+        self._completed = True
+        path, self._curr_path = self._curr_path, []
+        return path
+
+    def is_completed(self) -> bool:
+        return self._completed
+
+    def reset(self) -> None:
+        self.diverged_at = None
+        self._completed = False
+        self._curr_path = []
+
+    def estimated_total(self) -> int | None:
+        return 1
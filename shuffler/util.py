@@ -1,5 +1,7 @@
+import importlib
 import math
-from typing import TypeVar
+import sys
+from typing import Any, Callable, Hashable, Iterable, Mapping, TypeVar
 
 
 def n_interleavings(*n_ops: int) -> int:
@@ -30,3 +32,47 @@ def all_interleavings(*ops: list[T]) -> list[list[T]]:
     generate(ops, [])
     assert len(result) == n_interleavings(*map(len, ops))
     return result
+
+
+H = TypeVar("H", bound=Hashable)
+
+
+def find_cycle(edges: Mapping[H, H]) -> list[H] | None:
+    """Finds a cycle in a graph where each node has at most one outgoing edge"""
+    for start in edges:
+        path = [start]
+        while (nxt := edges.get(path[-1])) is not None:
+            if nxt in path:
+                return path[path.index(nxt) :]
+            path.append(nxt)
+    return None
+
+
+def lazy_import(
+    package: str,
+    submodules: Iterable[str] = (),
+    attributes: Mapping[str, str] | None = None,
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Module-level `__getattr__` and `__dir__` for `package`, importing `submodules`
+    and `attributes` (name -> relative module) on first access
+    """
+    submodules = frozenset(submodules)
+    attributes = dict(attributes or {})
+
+    def __getattr__(name: str) -> Any:
+        if name in submodules:
+            value = importlib.import_module(f".{name}", package)
+        elif name in attributes:
+            value = getattr(importlib.import_module(attributes[name], package), name)
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        # Cached, so that `__getattr__` isn't called for it again
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*vars(sys.modules[package]), *submodules, *attributes})
+
+    return __getattr__, __dir__
@@ -1,10 +1,13 @@
 import asyncio
+import gc
 import random
-from typing import Awaitable, Callable, TypeAlias
+import time
+from typing import Any, Awaitable, Callable, Coroutine, TypeAlias
 
 import pytest
 
 from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.shufflers.protocol import LivelockError
 from shuffler.strategies.exhaustive import ExhaustiveStrategy
 from shuffler.strategies.random import RandomStrategy
 from shuffler.util import all_interleavings
@@ -165,3 +168,175 @@ async def test_fuzzing() -> None:
         *([f"{task_id}-{op}" for op in (1, 2)] for task_id in "ABC")
     )
     assert sorted(sequences) == sorted(expected_sequences)
+
+
+async def test_livelock() -> None:
+    shuffler = AsyncioShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), max_wait_for=5.0, max_steps=10
+    )
+    state = {"started": False, "ready": False}
+
+    async def spinner() -> None:
+        async with shuffler.shuffle("A"):
+            state["started"] = True
+        # Never finishes unless B ran first
+        while not state["ready"]:
+            async with shuffler.shuffle("A"):
+                pass
+        shuffler.decrement_pool_size()
+
+    async def setter() -> None:
+        async with shuffler.shuffle("B"):
+            state["ready"] = not state["started"]
+        shuffler.decrement_pool_size()
+
+    errors = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        state.update(started=False, ready=False)
+        results = await asyncio.gather(spinner(), setter(), return_exceptions=True)
+        errors.append(results[0])
+        sequence = shuffler.finish_sequence()
+        assert (errors[-1] is None) is (sequence == ["B", "A"])
+
+    assert time.monotonic() - started_at < 5.0
+    livelocks = [error for error in errors if error is not None]
+    assert len(livelocks) == len(errors) - 1 == 10
+    for error in livelocks:
+        assert isinstance(error, LivelockError)
+        assert "A" in error.tasks
+
+
+async def test_stalled_task() -> None:
+    shuffler = AsyncioShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), max_wait_for=0.01, max_stalls=5
+    )
+    stop: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+    async def waiter() -> None:
+        async with shuffler.shuffle("A"):
+            pass
+        # Waits for something the shuffler doesn't know about, never reaching
+        # another scheduling point nor finishing by itself
+        await stop
+        shuffler.decrement_pool_size()
+
+    async def poller() -> None:
+        try:
+            while True:
+                async with shuffler.shuffle("B"):
+                    pass
+        finally:
+            stop.set_result(None)
+
+    started_at = time.monotonic()
+    results = await asyncio.gather(waiter(), poller(), return_exceptions=True)
+    shuffler.finish_sequence()
+
+    assert time.monotonic() - started_at < 1.0
+    assert results[0] is None
+    assert isinstance(results[1], LivelockError)
+    assert results[1].tasks == ["B"]
+
+
+async def test_run_tasks() -> None:
+    # Any step waiting for a finished task would blow the time limit below
+    shuffler = AsyncioShuffler(
+        pool_size=0, strategy=ExhaustiveStrategy(), max_wait_for=5.0
+    )
+
+    async def task(task_id: str, n_ops: int) -> str:
+        for _ in range(n_ops):
+            async with shuffler.shuffle(task_id):
+                pass
+        if task_id == "C":
+            raise ValueError(task_id)
+        return task_id
+
+    async def parent() -> str:
+        async with shuffler.shuffle("A"):
+            # Waited for by `run_tasks`
+            shuffler.spawn(task("D", 1))
+        async with shuffler.shuffle("A"):
+            pass
+        return "A"
+
+    sequences = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        results = await shuffler.run_tasks(
+            parent(), task("B", 1), task("C", 1), task("E", 0), return_exceptions=True
+        )
+        assert results[:2] == ["A", "B"]
+        assert isinstance(results[2], ValueError)
+        assert results[3] == "E"
+        sequences.append(shuffler.finish_sequence())
+
+    assert time.monotonic() - started_at < 5.0
+    # D only exists after the first op of A
+    expected = [
+        sequence
+        for sequence in all_interleavings(["A", "A"], ["B"], ["C"], ["D"])
+        if sequence.index("A") < sequence.index("D")
+    ]
+    assert sorted(sequences) == sorted(expected)
+    with pytest.raises(ValueError, match="C"):
+        await shuffler.run_tasks(task("C", 0))
+
+
+async def test_explore() -> None:
+    shuffler = AsyncioShuffler(
+        pool_size=0, strategy=ExhaustiveStrategy(), max_wait_for=5.0
+    )
+    state = {"value": 0}
+
+    async def increment(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            value = state["value"]
+        async with shuffler.shuffle(task_id):
+            state["value"] = value + 1
+
+    def tasks() -> list[Coroutine[Any, Any, None]]:
+        state["value"] = 0
+        return [increment("A"), increment("B")]
+
+    started_at = time.monotonic()
+    assert await shuffler.explore(tasks) == 6
+    assert time.monotonic() - started_at < 5.0
+    assert shuffler.stats.iterations == 6
+
+    def check() -> None:
+        assert state["value"] == 2
+
+    shuffler.reset()
+    with pytest.raises(AssertionError) as exc_info:
+        await shuffler.explore(tasks, check)
+    assert exc_info.value.__notes__ == [
+        "Failed on iteration 2 with sequence ['B', 'A', 'A', 'B']"
+    ]
+
+
+async def test_explore_failing_tasks() -> None:
+    shuffler = AsyncioShuffler(
+        pool_size=0, strategy=ExhaustiveStrategy(), max_wait_for=5.0
+    )
+    unretrieved: list[dict[str, Any]] = []
+    asyncio.get_running_loop().set_exception_handler(
+        lambda _, context: unretrieved.append(context)
+    )
+
+    async def failing(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            pass
+        raise ValueError(task_id)
+
+    with pytest.raises(ValueError, match="A") as exc_info:
+        await shuffler.explore(lambda: [failing("A"), failing("B")])
+    assert exc_info.value.__notes__ == [
+        "Failed on iteration 1 with sequence ['A', 'B']"
+    ]
+
+    # The other task's error isn't reported when it's collected
+    del exc_info
+    gc.collect()
+    assert unretrieved == []
@@ -0,0 +1,136 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from shuffler.corpus import Corpus, Outcome
+from shuffler.pytest_plugin import ExplorationFailed, run_exploration
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.strategies import CorpusStrategy, ExhaustiveStrategy, Strategy
+
+
+def test_record(tmp_path: Path) -> None:
+    path = tmp_path / "corpus.jsonl"
+    corpus = Corpus(path, "test-a")
+    corpus.record(["A", "B"], passed=True)
+    corpus.record(["A", "B"], passed=True)
+    corpus.record(["B", "A"], passed=False)
+    Corpus(path, "test-b").record(["A"], passed=False)
+
+    # Known outcomes and prefixes aren't written again
+    lines = path.read_text().splitlines()
+    assert len(lines) == 3
+    assert '"prefixes":[]' not in lines[1]
+
+    corpus = Corpus(path, "test-a")
+    assert len(corpus) == 2
+    assert corpus.is_verified(["A", "B"])
+    assert corpus.outcome(["B", "A"]) is Outcome.FAILED
+    assert corpus.outcome(["A"]) is None
+    assert corpus.failures() == [["B", "A"]]
+
+    corpus.record(["B", "A"], passed=True)
+    with path.open("a") as file:
+        file.write('{"key": "test-a", "sched')
+    assert Corpus(path, "test-a").failures() == []
+
+
+def make_shuffler(strategy: Strategy[str]) -> AsyncioShuffler:
+    return AsyncioShuffler(pool_size=2, strategy=strategy)
+
+
+async def run_tasks(shuffler: AsyncioShuffler, output: list[str]) -> None:
+    async def task(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            output.append(task_id)
+        shuffler.decrement_pool_size()
+
+    await asyncio.gather(task("A"), task("B"))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_unexplored_prefixes_first(seed: int, tmp_path: Path) -> None:
+    outputs = []
+
+    def run() -> None:
+        strategy: CorpusStrategy[str] = CorpusStrategy(max_iterations=1)
+        strategy.seed(seed)
+        output: list[str] = []
+
+        async def body(shuffler: AsyncioShuffler) -> None:
+            await run_tasks(shuffler, output)
+
+        run_exploration(
+            body,
+            make_shuffler,
+            lambda: strategy,
+            corpus=Corpus(tmp_path / "corpus.jsonl", "test"),
+        )
+        assert strategy.repeated == 0
+        outputs.append("".join(output))
+
+    run()
+    run()
+    assert sorted(outputs) == ["AB", "BA"]
+
+
+async def run_ops(shuffler: AsyncioShuffler, output: list[str]) -> None:
+    async def task(task_id: str) -> None:
+        for _ in range(2):
+            async with shuffler.shuffle(task_id):
+                output.append(task_id)
+        shuffler.decrement_pool_size()
+
+    await asyncio.gather(task("A"), task("B"))
+
+
+@pytest.mark.parametrize("first_run", [3, 100])
+def test_verified_schedules_skipped(first_run: int, tmp_path: Path) -> None:
+    outputs: list[str] = []
+
+    def run(max_iterations: int) -> int:
+        strategy: CorpusStrategy[str] = CorpusStrategy(max_iterations=max_iterations)
+        strategy.seed(first_run)
+
+        async def body(shuffler: AsyncioShuffler) -> None:
+            output: list[str] = []
+            await run_ops(shuffler, output)
+            outputs.append("".join(output))
+
+        iterations = run_exploration(
+            body,
+            make_shuffler,
+            lambda: strategy,
+            corpus=Corpus(tmp_path / "corpus.jsonl", "test"),
+        )
+        assert strategy.repeated == 0
+        return iterations
+
+    assert run(first_run) == min(first_run, 6)
+    # Only schedules that weren't verified yet, none once all of them were
+    assert run(100) == 6 - min(first_run, 6)
+    assert run(100) == 0
+    assert sorted(outputs) == ["AABB", "ABAB", "ABBA", "BAAB", "BABA", "BBAA"]
+
+
+def test_failures_replayed_first(tmp_path: Path) -> None:
+    path = tmp_path / "corpus.jsonl"
+    fixed = False
+
+    async def body(shuffler: AsyncioShuffler) -> None:
+        output: list[str] = []
+        await run_tasks(shuffler, output)
+        assert fixed or output != ["B", "A"]
+
+    with pytest.raises(ExplorationFailed, match="iteration 2 .* \\['B', 'A'\\]"):
+        run_exploration(body, make_shuffler, corpus=Corpus(path, "test"))
+
+    # Fails right away now
+    with pytest.raises(ExplorationFailed, match="iteration 1 .* \\['B', 'A'\\]"):
+        run_exploration(body, make_shuffler, corpus=Corpus(path, "test"))
+
+    fixed = True
+    iterations = run_exploration(body, make_shuffler, corpus=Corpus(path, "test"))
+    assert iterations == 3
+    assert Corpus(path, "test").failures() == []
+    assert run_exploration(body, make_shuffler, ExhaustiveStrategy) == 2
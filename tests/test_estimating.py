@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.strategies.estimating import Estimate, EstimatingStrategy
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+from shuffler.strategies.random import RandomStrategy
+from shuffler.util import n_interleavings
+
+
+async def estimate(ops_counts: list[int], n_probes: int) -> Estimate:
+    strategy: EstimatingStrategy[str] = EstimatingStrategy(n_probes=n_probes)
+    strategy.seed(0)
+    shuffler = AsyncioShuffler(pool_size=len(ops_counts), strategy=strategy)
+
+    async def task(task_id: str, n_ops: int) -> None:
+        for _ in range(n_ops):
+            async with shuffler.shuffle(task_id):
+                pass
+        shuffler.decrement_pool_size()
+
+    while not shuffler.strategy_completed():
+        await asyncio.gather(
+            *(task(f"Task-{ix}", n_ops) for ix, n_ops in enumerate(ops_counts))
+        )
+        sequence = shuffler.finish_sequence()
+        assert len(sequence) == sum(ops_counts)
+
+    assert shuffler.stats.iterations == n_probes
+    return strategy.estimate()
+
+
+@pytest.mark.parametrize("ops_counts", ([1, 1], [1, 1, 1], [3]))
+async def test_exact(ops_counts: list[int]) -> None:
+    # Every path has the same branching factors
+    result = await estimate(ops_counts, n_probes=3)
+    assert result.schedules == n_interleavings(*ops_counts)
+    assert result.stderr == 0
+    assert result.probes == 3
+    assert result.iteration_time > 0
+
+
+@pytest.mark.parametrize("ops_counts", ([2, 2], [1, 2, 3], [3, 3]))
+async def test_estimate(ops_counts: list[int]) -> None:
+    result = await estimate(ops_counts, n_probes=200)
+    expected = n_interleavings(*ops_counts)
+    assert abs(result.schedules - expected) <= max(4 * result.stderr, 1)
+
+
+def test_strategy_choice() -> None:
+    result = Estimate(schedules=100, stderr=0, iteration_time=0.01, probes=10)
+    assert result.duration == pytest.approx(1.0)
+
+    assert isinstance(result.strategy(budget=2), ExhaustiveStrategy)
+
+    strategy = result.strategy(budget=0.5)
+    assert isinstance(strategy, RandomStrategy)
+    assert strategy.max_iterations == 50
@@ -0,0 +1,131 @@
+import os
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from shuffler.fork import ForkExplorer
+from shuffler.util import all_interleavings
+
+
+class Db:
+    def __init__(self, log: Path) -> None:
+        self.value = 0
+        self._log = log
+
+    def op(self) -> None:
+        # Ops of all processes end up in the same file
+        with self._log.open("a") as file:
+            file.write(f"{os.getpid()}\n")
+
+
+def increment(db: Db) -> Iterator[None]:
+    yield
+    db.op()
+    value = db.value
+    yield
+    db.op()
+    db.value = value + 1
+
+
+def n_prefixes(sequences: list[list[str]]) -> int:
+    return len({tuple(sequence[:ix]) for sequence in sequences for ix in range(1, 5)})
+
+
+def test_exhaustive(tmp_path: Path) -> None:
+    log = tmp_path / "ops.log"
+    db = Db(log)
+    checked = []
+
+    result = ForkExplorer(stop_on_failure=False).explore(
+        {"A": increment(db), "B": increment(db)},
+        check=lambda: checked.append(db.value),
+    )
+
+    expected = all_interleavings(["A", "A"], ["B", "B"])
+    assert sorted(result.sequences) == sorted(expected)
+    # Each node of the tree is executed once rather than once per sequence
+    assert len(log.read_text().splitlines()) == n_prefixes(expected)
+    assert n_prefixes(expected) < sum(map(len, expected))
+    assert result.forks == len(expected) - 1
+    assert result.failures == []
+
+    # Tasks ran in forked processes, the caller's state is untouched
+    assert db.value == 0
+    assert checked == []
+
+
+def test_failures(tmp_path: Path) -> None:
+    db = Db(tmp_path / "ops.log")
+
+    def check() -> None:
+        assert db.value == 2
+
+    result = ForkExplorer(stop_on_failure=False).explore(
+        {"A": increment(db), "B": increment(db)}, check=check
+    )
+    assert len(result.sequences) == 6
+    assert sorted(failure.sequence for failure in result.failures) == [
+        ["A", "B", "A", "B"],
+        ["A", "B", "B", "A"],
+        ["B", "A", "A", "B"],
+        ["B", "A", "B", "A"],
+    ]
+    assert "assert 1 == 2" in result.failures[0].traceback
+
+    result = ForkExplorer().explore(
+        {"A": increment(db), "B": increment(db)}, check=check
+    )
+    assert len(result.failures) == 1
+    assert len(result.sequences) < 6
+
+
+def test_task_error() -> None:
+    def failing() -> Iterator[None]:
+        yield
+        raise ValueError("boom")
+
+    def noop() -> Iterator[None]:
+        yield
+
+    result = ForkExplorer(stop_on_failure=False).explore({"A": failing(), "B": noop()})
+    failures = sorted(failure.sequence for failure in result.failures)
+    assert failures == [["A"], ["B", "A"]]
+    assert all("ValueError: boom" in failure.traceback for failure in result.failures)
+
+
+def test_base_exception(tmp_path: Path) -> None:
+    db = Db(tmp_path / "ops.log")
+
+    def check() -> None:
+        if db.value != 2:
+            pytest.fail("lost update")
+
+    result = ForkExplorer(stop_on_failure=False).explore(
+        {"A": increment(db), "B": increment(db)}, check=check
+    )
+    assert len(result.failures) == 4
+    assert all("lost update" in failure.traceback for failure in result.failures)
+
+    def exiting() -> Iterator[None]:
+        yield
+        raise SystemExit(3)
+
+    result = ForkExplorer().explore({"A": exiting()})
+    assert [failure.sequence for failure in result.failures] == [["A"]]
+    assert "SystemExit: 3" in result.failures[0].traceback
+
+
+def test_setup_runs_once(tmp_path: Path) -> None:
+    log = tmp_path / "setup.log"
+
+    def task() -> Iterator[None]:
+        with log.open("a") as file:
+            file.write("setup\n")
+        yield
+        yield
+
+    result = ForkExplorer().explore({"A": task(), "B": task(), "C": task()})
+    assert len(result.sequences) == 90
+    # Code before the first scheduling point isn't repeated per sequence
+    assert len(log.read_text().splitlines()) == 3
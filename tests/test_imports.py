@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import pytest
+
+import shuffler
+from shuffler import plugins, strategies
+from shuffler.plugins.eventloop import EventLoopPlugin
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+
+
+def test_no_heavy_imports() -> None:
+    code = (
+        "import sys, shuffler, shuffler.shufflers, shuffler.strategies,"
+        " shuffler.plugins, shuffler.primitives, shuffler.pytest_plugin;"
+        " from shuffler.plugins import EventLoopPlugin;"
+        " print(sorted({'sqlalchemy', 'asyncpg'} & set(sys.modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_lazy_attributes() -> None:
+    assert shuffler.strategies is strategies
+    assert plugins.EventLoopPlugin is EventLoopPlugin
+    assert strategies.ExhaustiveStrategy is ExhaustiveStrategy
+    assert {"ExhaustiveStrategy", "Estimate"} <= set(dir(strategies))
+    assert "primitives" in dir(shuffler)
+
+    with pytest.raises(AttributeError):
+        _ = strategies.UnknownStrategy
@@ -0,0 +1,90 @@
+import pytest
+
+from shuffler.stats import StatsCollector
+from shuffler.strategies import (
+    ExhaustiveStrategy,
+    Interner,
+    RandomStrategy,
+    ReplayStrategy,
+    Strategy,
+)
+from shuffler.util import all_interleavings
+
+
+def test_interner() -> None:
+    interner: Interner[str] = Interner()
+    assert [interner.bit(task_id) for task_id in "BAB"] == [1, 2, 1]
+    assert interner.ids == ["B", "A"]
+    assert interner.indices == {"B": 0, "A": 1}
+    assert interner.decode(0b11) == {"A", "B"}
+    assert interner.decode(0b10) == {"A"}
+
+
+def explore(strategy: Strategy[str], ops_counts: dict[str, int]) -> list[list[str]]:
+    interner: Interner[str] = Interner()
+    sequences = []
+    while not strategy.is_completed():
+        remaining = dict(ops_counts)
+        pending = sum(interner.bit(task_id) for task_id in remaining)
+        while pending:
+            task_id = interner.ids[strategy.choose_next_mask(pending, interner)]
+            remaining[task_id] -= 1
+            if not remaining[task_id]:
+                pending ^= interner.bit(task_id)
+        sequences.append(strategy.finish_sequence())
+    return sequences
+
+
+def test_exhaustive() -> None:
+    ops_counts = {"B": 2, "A": 1, "C": 2}
+    expected = all_interleavings(
+        *([task_id] * n_ops for task_id, n_ops in ops_counts.items())
+    )
+    assert sorted(explore(ExhaustiveStrategy(), ops_counts)) == sorted(expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random(seed: int) -> None:
+    strategy: RandomStrategy[str] = RandomStrategy(max_iterations=20)
+    strategy.seed(seed)
+    ops_counts = {"A": 2, "B": 1, "C": 3}
+    for sequence in explore(strategy, ops_counts):
+        assert sorted(sequence) == sorted("AABCCC")
+
+
+def test_protocol_fallback() -> None:
+    sequences = explore(ReplayStrategy(["B", "A", "A"]), {"A": 2, "B": 1})
+    assert sequences == [["B", "A", "A"]]
+
+
+class DuckTypedStrategy:
+    """Implements the methods of `Strategy` without subclassing it"""
+
+    def __init__(self) -> None:
+        self._path: list[str] = []
+
+    def choose_next(self, options: set[str]) -> str:
+        selected = min(options)
+        self._path.append(selected)
+        return selected
+
+    def finish_sequence(self) -> list[str]:
+        path, self._path = self._path, []
+        return path
+
+    def is_completed(self) -> bool:
+        return False
+
+    def reset(self) -> None:
+        self._path = []
+
+
+def test_duck_typed_strategy() -> None:
+    interner: Interner[str] = Interner()
+    pending = interner.bit("B") | interner.bit("A")
+    # Accepted at runtime, type checkers require the protocol's default methods
+    metrics: StatsCollector[str] = StatsCollector(
+        DuckTypedStrategy()  # type: ignore[arg-type]
+    )
+    assert interner.ids[metrics.choose_next_mask(pending, interner)] == "A"
+    assert metrics.finish_sequence() == ["A"]
@@ -0,0 +1,167 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+
+from shuffler.linearizability import (
+    Call,
+    Counter,
+    History,
+    LinearizabilityError,
+    Register,
+    is_linearizable,
+)
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.shufflers.threading import ThreadingShuffler
+from shuffler.strategies import ExhaustiveStrategy
+
+
+def call(
+    name: str, *args: Any, span: tuple[int, int | None], output: Any = None
+) -> Call:
+    return Call(None, "key", name, args, *span, output=output)
+
+
+@pytest.mark.parametrize(
+    ("calls", "expected"),
+    (
+        ([call("write", 1, span=(0, 1)), call("read", span=(2, 3), output=1)], True),
+        ([call("write", 1, span=(0, 1)), call("read", span=(2, 3), output=0)], False),
+        # Overlapping calls take effect in either order
+        ([call("write", 1, span=(0, 3)), call("read", span=(1, 2), output=0)], True),
+        ([call("write", 1, span=(0, 3)), call("read", span=(1, 2), output=1)], True),
+        (
+            [
+                call("write", 1, span=(0, 5)),
+                call("read", span=(1, 2), output=1),
+                call("read", span=(3, 4), output=0),
+            ],
+            False,
+        ),
+        # A pending call may or may not have taken effect
+        ([call("write", 1, span=(0, None)), call("read", span=(1, 2), output=1)], True),
+        ([call("write", 1, span=(0, None)), call("read", span=(1, 2), output=0)], True),
+        (
+            [
+                call("cas", 0, 1, span=(0, 3), output=True),
+                call("cas", 0, 2, span=(1, 2), output=True),
+            ],
+            False,
+        ),
+        (
+            [
+                call("cas", 0, 1, span=(0, 3), output=True),
+                call("cas", 0, 2, span=(1, 2), output=False),
+                call("read", span=(4, 5), output=1),
+            ],
+            True,
+        ),
+        ([], True),
+    ),
+)
+def test_register(calls: list[Call], expected: bool) -> None:
+    assert is_linearizable(calls, Register(0)) is expected
+
+
+def test_many_concurrent_calls() -> None:
+    # All increments overlap, the outputs are a permutation of 1..n
+    n = 14
+    calls = [
+        call("increment", span=(ix, 2 * n - ix), output=(ix * 5) % n + 1)
+        for ix in range(n)
+    ]
+    assert is_linearizable(calls, Counter())
+
+    calls[-1].output = calls[0].output
+    assert not is_linearizable(calls, Counter())
+
+
+def test_history() -> None:
+    history = History(Register())
+    with history.operation("a", "write", 1, task_id="A"):
+        pass
+    with pytest.raises(ValueError, match="boom"):
+        with history.operation("b", "write", 1, task_id="B"):
+            raise ValueError("boom")
+    with history.operation("b", "read", task_id="B") as read:
+        read.output = 1
+
+    # The failed write may have taken effect
+    history.check()
+    with history.operation("a", "read", task_id="A") as read:
+        read.output = 2
+
+    with pytest.raises(LinearizabilityError) as exc_info:
+        history.check()
+    assert exc_info.value.key == "a"
+    assert str(exc_info.value) == (
+        "History of 'a' isn't linearizable:\n  A: write(1) -> None\n  A: read() -> 2"
+    )
+
+
+async def test_asyncio() -> None:
+    history = History(Counter())
+    shuffler = AsyncioShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), history=history
+    )
+    state = {"value": 0}
+
+    async def increment(task_id: str) -> None:
+        with history.operation("value", "increment", task_id=task_id) as call:
+            async with shuffler.shuffle(task_id):
+                value = state["value"]
+            async with shuffler.shuffle(task_id):
+                state["value"] = value + 1
+            call.output = value + 1
+        shuffler.decrement_pool_size()
+
+    failures = []
+    while not shuffler.strategy_completed():
+        state["value"] = 0
+        await asyncio.gather(increment("A"), increment("B"))
+        try:
+            history.check()
+        except LinearizabilityError as e:
+            failures.append(e)
+        sequence = shuffler.finish_sequence()
+        assert (state["value"] == 2) is (sequence in (list("AABB"), list("BBAA")))
+
+    assert len(failures) == 4
+    for failure in failures:
+        assert str(failure).endswith("A: increment() -> 1\n  B: increment() -> 1")
+    assert history.calls == []
+
+
+def test_threading() -> None:
+    history = History(Register(0))
+    shuffler = ThreadingShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), history=history
+    )
+    state = {"value": 0}
+
+    def write(value: int) -> None:
+        with (
+            shuffler.shuffle(f"write-{value}"),
+            history.operation("key", "write", value),
+        ):
+            state["value"] = value
+        shuffler.decrement_pool_size()
+
+    def read() -> None:
+        with shuffler.shuffle("read"), history.operation("key", "read") as call:
+            call.output = state["value"]
+        shuffler.decrement_pool_size()
+
+    iterations = 0
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        while not shuffler.strategy_completed():
+            state["value"] = 0
+            for future in [executor.submit(write, 1), executor.submit(read)]:
+                future.result()
+            history.check()
+            assert {call.task_id for call in history.calls} == {"write-1", "read"}
+            shuffler.finish_sequence()
+            iterations += 1
+
+    assert iterations == 2
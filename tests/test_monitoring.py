@@ -0,0 +1,145 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+import pytest
+
+from shuffler.shufflers.monitoring import Monitor
+from shuffler.shufflers.threading import ThreadingShuffler
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+from shuffler.util import n_interleavings
+
+R = TypeVar("R")
+
+counter = 0
+
+
+class Account:
+    def __init__(self) -> None:
+        self.balance = 0
+
+    def deposit(self, amount: int) -> None:
+        balance = self.balance
+        self.balance = balance + amount
+
+
+def increment_global() -> None:
+    global counter  # noqa: PLW0603
+    value = counter
+    counter = value + 1
+
+
+def serialize(value: int) -> str:
+    return json.dumps({"value": value})
+
+
+def untouched(account: Account) -> None:
+    account.balance += 1
+
+
+def explore(
+    monitor: Monitor,
+    shuffler: ThreadingShuffler,
+    tasks: dict[str, Callable[[], object]],
+    check: Callable[[], R],
+) -> tuple[list[list[str]], list[R]]:
+    def run(task_id: str, fn: Callable[[], object]) -> None:
+        with monitor.task(task_id):
+            fn()
+
+    sequences, results = [], []
+    with monitor:
+        while not shuffler.strategy_completed():
+            with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+                for future in [pool.submit(run, *item) for item in tasks.items()]:
+                    future.result()
+            sequences.append(shuffler.finish_sequence())
+            results.append(check())
+
+    return sequences, results
+
+
+def test_attributes() -> None:
+    shuffler = ThreadingShuffler(pool_size=2, strategy=ExhaustiveStrategy())
+    monitor = Monitor(shuffler, [Account])
+    account = Account()
+
+    def check() -> int:
+        balance = account.balance
+        account.balance = 0
+        return balance
+
+    sequences, balances = explore(
+        monitor,
+        shuffler,
+        {"A": lambda: account.deposit(1), "B": lambda: account.deposit(1)},
+        check,
+    )
+
+    # `self.balance` load and store
+    assert len(sequences) == n_interleavings(2, 2)
+    assert sorted(balances) == [1, 1, 1, 1, 2, 2]
+
+
+def test_globals() -> None:
+    shuffler = ThreadingShuffler(pool_size=2, strategy=ExhaustiveStrategy())
+    monitor = Monitor(shuffler, [increment_global], attributes=False)
+
+    def check() -> int:
+        global counter
+        value, counter = counter, 0
+        return value
+
+    sequences, values = explore(
+        monitor,
+        shuffler,
+        {"A": increment_global, "B": increment_global},
+        check,
+    )
+
+    assert len(sequences) == n_interleavings(2, 2)
+    assert sorted(values) == [1, 1, 1, 1, 2, 2]
+
+
+def test_calls_into() -> None:
+    shuffler = ThreadingShuffler(pool_size=2, strategy=ExhaustiveStrategy())
+    monitor = Monitor(
+        shuffler,
+        [serialize],
+        attributes=False,
+        global_vars=False,
+        calls_into=[json],
+    )
+
+    sequences, _ = explore(
+        monitor,
+        shuffler,
+        {
+            "A": lambda: [serialize(1), serialize(2)],
+            "B": lambda: serialize(3),
+        },
+        lambda: None,
+    )
+
+    assert sorted(sequences) == sorted(
+        [["A", "A", "B"], ["A", "B", "A"], ["B", "A", "A"]]
+    )
+
+
+@pytest.mark.parametrize("n_calls", [1, 3])
+def test_untargeted_code(n_calls: int) -> None:
+    shuffler = ThreadingShuffler(pool_size=2, strategy=ExhaustiveStrategy())
+    monitor = Monitor(shuffler, [Account.deposit])
+    account = Account()
+
+    def task(task_id: str) -> None:
+        with monitor.task(task_id):
+            for _ in range(n_calls):
+                untouched(account)
+
+    with monitor, ThreadPoolExecutor(max_workers=2) as pool:
+        for future in [pool.submit(task, task_id) for task_id in "AB"]:
+            future.result()
+
+    assert shuffler.finish_sequence() == []
+    assert account.balance == 2 * n_calls
@@ -0,0 +1,230 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+import pytest
+
+from shuffler.primitives.asyncio import Event, Lock, Queue, patch
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.shufflers.protocol import DeadlockError
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+
+# Any timeout at a scheduling point would blow the time limits below
+MAX_WAIT_FOR = 5.0
+
+
+def make_shuffler() -> AsyncioShuffler:
+    return AsyncioShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), max_wait_for=MAX_WAIT_FOR
+    )
+
+
+async def explore_once(
+    shuffler: AsyncioShuffler,
+    tasks: dict[str, Callable[[str], Awaitable[None]]],
+) -> list[BaseException | None]:
+    results = await asyncio.gather(
+        *(task(task_id) for task_id, task in tasks.items()),
+        return_exceptions=True,
+    )
+    shuffler.finish_sequence()
+    return [result if isinstance(result, BaseException) else None for result in results]
+
+
+async def test_lock() -> None:
+    shuffler = make_shuffler()
+    lock = Lock(shuffler)
+    output: list[str] = []
+    outputs = []
+
+    async def task(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            await lock.acquire()
+        async with shuffler.shuffle(task_id):
+            output.append(f"{task_id}-enter")
+        async with shuffler.shuffle(task_id):
+            output.append(f"{task_id}-exit")
+            lock.release()
+        shuffler.decrement_pool_size()
+
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        errors = await explore_once(shuffler, {"A": task, "B": task})
+        assert errors == [None, None]
+        outputs.append(tuple(output))
+        output.clear()
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+    assert set(outputs) == {
+        ("A-enter", "A-exit", "B-enter", "B-exit"),
+        ("B-enter", "B-exit", "A-enter", "A-exit"),
+    }
+    assert len(outputs) > 2
+
+
+async def test_deadlock() -> None:
+    shuffler = make_shuffler()
+    locks: dict[str, Lock] = {}
+
+    async def task(task_id: str) -> None:
+        first, second = (locks["A"], locks["B"])[:: 1 if task_id == "A" else -1]
+        async with shuffler.shuffle(task_id):
+            await first.acquire()
+        async with shuffler.shuffle(task_id):
+            await second.acquire()
+        async with shuffler.shuffle(task_id):
+            second.release()
+            first.release()
+        shuffler.decrement_pool_size()
+
+    errors = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        locks.update(A=Lock(shuffler), B=Lock(shuffler))
+        errors.extend(await explore_once(shuffler, {"A": task, "B": task}))
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+
+    deadlocks = [error for error in errors if error is not None]
+    assert deadlocks
+    for error in deadlocks:
+        assert isinstance(error, DeadlockError)
+        assert sorted(error.cycle) == ["A", "B"]
+    assert None in errors
+
+
+async def test_partial_deadlock() -> None:
+    shuffler = AsyncioShuffler(
+        pool_size=3, strategy=ExhaustiveStrategy(), max_wait_for=MAX_WAIT_FOR
+    )
+    locks: dict[str, Lock] = {}
+
+    async def locking(task_id: str) -> None:
+        first, second = (locks["A"], locks["B"])[:: 1 if task_id == "A" else -1]
+        async with shuffler.shuffle(task_id):
+            await first.acquire()
+        async with shuffler.shuffle(task_id):
+            await second.acquire()
+        async with shuffler.shuffle(task_id):
+            second.release()
+            first.release()
+        shuffler.decrement_pool_size()
+
+    async def busy(task_id: str) -> None:
+        # Keeps running while the others are deadlocked
+        for _ in range(2):
+            async with shuffler.shuffle(task_id):
+                pass
+        shuffler.decrement_pool_size()
+
+    errors = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        locks.update(A=Lock(shuffler), B=Lock(shuffler))
+        errors.append(
+            await explore_once(shuffler, {"A": locking, "B": locking, "C": busy})
+        )
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+
+    deadlocks = [error for error in errors if error != [None, None, None]]
+    assert deadlocks
+    for first, second, busy_error in deadlocks:
+        assert isinstance(first, DeadlockError)
+        assert second is first
+        assert sorted(first.cycle) == ["A", "B"]
+        # The busy task is aborted at its next scheduling point, if any
+        assert busy_error is None or busy_error is first
+
+
+@pytest.mark.parametrize("maxsize", [0, 1])
+async def test_queue(maxsize: int) -> None:
+    shuffler = make_shuffler()
+    results = []
+
+    async def run() -> None:
+        items: Queue[int] = Queue(shuffler, maxsize=maxsize)
+        received = []
+
+        async def producer(task_id: str) -> None:
+            for item in range(3):
+                async with shuffler.shuffle(task_id):
+                    await items.put(item)
+            shuffler.decrement_pool_size()
+
+        async def consumer(task_id: str) -> None:
+            for _ in range(3):
+                async with shuffler.shuffle(task_id):
+                    received.append(await items.get())
+            shuffler.decrement_pool_size()
+
+        errors = await explore_once(shuffler, {"P": producer, "C": consumer})
+        assert errors == [None, None]
+        results.append(received)
+
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        await run()
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+    assert all(received == [0, 1, 2] for received in results)
+    assert len(results) > 1
+
+
+async def test_patch() -> None:
+    shuffler = make_shuffler()
+    with patch(shuffler):
+        event = asyncio.Event()
+        items: asyncio.Queue[int] = asyncio.Queue()
+
+    assert isinstance(event, Event)
+    assert isinstance(items, Queue)
+    assert not isinstance(asyncio.Event(), Event)
+
+    async def waiter(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            await event.wait()
+        shuffler.decrement_pool_size()
+
+    async def setter(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            event.set()
+        shuffler.decrement_pool_size()
+
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        assert await explore_once(shuffler, {"W": waiter, "S": setter}) == [None, None]
+        event.clear()
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+
+
+async def test_patch_blocking() -> None:
+    shuffler = make_shuffler()
+
+    async def task(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            await lock.acquire()
+        async with shuffler.shuffle(task_id):
+            lock.release()
+        shuffler.decrement_pool_size()
+
+    # Blocked tasks are parked while the primitives are still patched
+    with patch(shuffler):
+        lock = asyncio.Lock()
+        started_at = time.monotonic()
+        while not shuffler.strategy_completed():
+            assert await explore_once(shuffler, {"A": task, "B": task}) == [None, None]
+
+    assert isinstance(lock, Lock)
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+
+
+async def test_unregistered_task() -> None:
+    lock = Lock(make_shuffler())
+    await lock.acquire()
+    waiter = asyncio.ensure_future(lock.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    lock.release()
+    assert await waiter
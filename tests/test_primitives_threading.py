@@ -0,0 +1,275 @@
+import _thread
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import pytest
+
+from shuffler.primitives.threading import Condition, Lock, Queue, patch
+from shuffler.shufflers.protocol import DeadlockError
+from shuffler.shufflers.threading import ThreadingShuffler
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+
+# Any timeout at a scheduling point would blow the time limits below
+MAX_WAIT_FOR = 5.0
+
+
+def make_shuffler() -> ThreadingShuffler:
+    return ThreadingShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), max_wait_for=MAX_WAIT_FOR
+    )
+
+
+def test_lock() -> None:
+    shuffler = make_shuffler()
+    lock = Lock(shuffler)
+    output: list[str] = []
+    outputs = []
+
+    def task(task_id: str) -> None:
+        with shuffler.shuffle(task_id):
+            lock.acquire()
+        with shuffler.shuffle(task_id):
+            output.append(f"{task_id}-enter")
+        with shuffler.shuffle(task_id):
+            output.append(f"{task_id}-exit")
+            lock.release()
+        shuffler.decrement_pool_size()
+
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        errors = explore_once(shuffler, {"A": task, "B": task})
+        assert errors == [None, None]
+        outputs.append(tuple(output))
+        output.clear()
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+    assert set(outputs) == {
+        ("A-enter", "A-exit", "B-enter", "B-exit"),
+        ("B-enter", "B-exit", "A-enter", "A-exit"),
+    }
+    # Also explores which of the tasks gets the lock once it's released
+    assert len(outputs) > 2
+
+
+def explore_once(
+    shuffler: ThreadingShuffler,
+    tasks: dict[str, Callable[[str], None]],
+) -> list[BaseException | None]:
+    with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+        futures = [pool.submit(task, task_id) for task_id, task in tasks.items()]
+        errors = [future.exception() for future in futures]
+    shuffler.finish_sequence()
+    return errors
+
+
+def test_deadlock() -> None:
+    shuffler = make_shuffler()
+    locks: dict[str, Lock] = {}
+
+    def task(task_id: str) -> None:
+        first, second = (locks["A"], locks["B"])[:: 1 if task_id == "A" else -1]
+        with shuffler.shuffle(task_id):
+            first.acquire()
+        with shuffler.shuffle(task_id):
+            second.acquire()
+        with shuffler.shuffle(task_id):
+            second.release()
+            first.release()
+        shuffler.decrement_pool_size()
+
+    errors = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        locks.update(A=Lock(shuffler), B=Lock(shuffler))
+        errors.extend(explore_once(shuffler, {"A": task, "B": task}))
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+
+    deadlocks = [error for error in errors if error is not None]
+    assert deadlocks
+    for error in deadlocks:
+        assert isinstance(error, DeadlockError)
+        assert sorted(error.cycle) == ["A", "B"]
+    assert None in errors
+
+
+def test_partial_deadlock() -> None:
+    shuffler = ThreadingShuffler(
+        pool_size=3, strategy=ExhaustiveStrategy(), max_wait_for=MAX_WAIT_FOR
+    )
+    locks: dict[str, Lock] = {}
+
+    def locking(task_id: str) -> None:
+        first, second = (locks["A"], locks["B"])[:: 1 if task_id == "A" else -1]
+        with shuffler.shuffle(task_id):
+            first.acquire()
+        with shuffler.shuffle(task_id):
+            second.acquire()
+        with shuffler.shuffle(task_id):
+            second.release()
+            first.release()
+        shuffler.decrement_pool_size()
+
+    def busy(task_id: str) -> None:
+        # Keeps running while the others are deadlocked
+        for _ in range(2):
+            with shuffler.shuffle(task_id):
+                pass
+        shuffler.decrement_pool_size()
+
+    errors = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        locks.update(A=Lock(shuffler), B=Lock(shuffler))
+        errors.append(explore_once(shuffler, {"A": locking, "B": locking, "C": busy}))
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+
+    deadlocks = [error for error in errors if error != [None, None, None]]
+    assert deadlocks
+    for first, second, busy_error in deadlocks:
+        assert isinstance(first, DeadlockError)
+        assert second is first
+        assert sorted(first.cycle) == ["A", "B"]
+        # The busy task is aborted at its next scheduling point, if any
+        assert busy_error is None or busy_error is first
+
+
+class RacyRawLock:
+    """
+    Raw lock of `Lock` which lets other threads run right after failed attempts
+    or releases, i.e. in between them and parking the task
+    """
+
+    def __init__(self, after_failure: float = 0.0, after_release: float = 0.0) -> None:
+        self._lock = _thread.allocate_lock()
+        self._after_failure = after_failure
+        self._after_release = after_release
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        acquired = self._lock.acquire(blocking, timeout)
+        if not acquired:
+            time.sleep(self._after_failure)
+        return acquired
+
+    def release(self) -> None:
+        self._lock.release()
+        time.sleep(self._after_release)
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+
+def test_lock_released_before_parking() -> None:
+    # The other task's op starts while the first one is between ops
+    shuffler = ThreadingShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), max_wait_for=0.01
+    )
+    lock = Lock(shuffler)
+    lock._lock = RacyRawLock(after_failure=0.05)  # type: ignore[assignment]
+
+    def task(task_id: str) -> None:
+        with shuffler.shuffle(task_id):
+            lock.acquire()
+        # Between ops, right after the other task's attempt failed
+        time.sleep(0.02)
+        lock.release()
+        shuffler.decrement_pool_size()
+
+    assert explore_once(shuffler, {"A": task, "B": task}) == [None, None]
+
+
+def test_condition_notified_before_parking() -> None:
+    shuffler = ThreadingShuffler(
+        pool_size=1, strategy=ExhaustiveStrategy(), max_wait_for=MAX_WAIT_FOR
+    )
+    lock = Lock(shuffler)
+    lock._lock = RacyRawLock(after_release=0.05)  # type: ignore[assignment]
+    condition = Condition(shuffler, lock)
+    ready: list[bool] = []
+
+    def waiter(task_id: str) -> None:
+        with shuffler.shuffle(task_id), condition:
+            condition.wait_for(lambda: ready)
+        shuffler.decrement_pool_size()
+
+    def notifier() -> None:
+        # A plain thread, notifies as soon as the waiter releases the lock
+        time.sleep(0.02)
+        with condition:
+            ready.append(True)
+            condition.notify()
+
+    thread = threading.Thread(target=notifier)
+    thread.start()
+    assert explore_once(shuffler, {"W": waiter}) == [None]
+    thread.join()
+
+
+@pytest.mark.parametrize("maxsize", [0, 1])
+def test_queue(maxsize: int) -> None:
+    shuffler = make_shuffler()
+    results = []
+
+    def run() -> None:
+        items: Queue[int] = Queue(shuffler, maxsize=maxsize)
+        received = []
+
+        def producer(task_id: str) -> None:
+            for item in range(3):
+                with shuffler.shuffle(task_id):
+                    items.put(item)
+            shuffler.decrement_pool_size()
+
+        def consumer(task_id: str) -> None:
+            for _ in range(3):
+                with shuffler.shuffle(task_id):
+                    received.append(items.get())
+            shuffler.decrement_pool_size()
+
+        errors = explore_once(shuffler, {"P": producer, "C": consumer})
+        assert errors == [None, None]
+        results.append(received)
+
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        run()
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
+    assert all(received == [0, 1, 2] for received in results)
+    assert len(results) > 1
+
+
+def test_patch() -> None:
+    shuffler = make_shuffler()
+    with patch(shuffler):
+        lock = threading.Lock()
+        items: queue.Queue[int] = queue.Queue()
+        condition = threading.Condition()
+
+    assert isinstance(lock, Lock)
+    assert isinstance(items, Queue)
+    assert threading.Lock is not type(lock)
+
+    ready = []
+
+    def waiter(task_id: str) -> None:
+        with shuffler.shuffle(task_id), condition:
+            condition.wait_for(lambda: ready)
+        shuffler.decrement_pool_size()
+
+    def notifier(task_id: str) -> None:
+        with shuffler.shuffle(task_id), condition:
+            ready.append(True)
+            condition.notify_all()
+        shuffler.decrement_pool_size()
+
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        assert explore_once(shuffler, {"W": waiter, "N": notifier}) == [None, None]
+        ready.clear()
+
+    assert time.monotonic() - started_at < MAX_WAIT_FOR
@@ -0,0 +1,80 @@
+import multiprocessing
+import pickle
+from pathlib import Path
+
+import pytest
+
+from shuffler.shufflers.process import ProcessShuffler
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+from shuffler.util import all_interleavings
+
+# The coordinator thread is running while workers are forked
+pytestmark = pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+
+
+def task(shuffler: ProcessShuffler, task_ix: int, n_ops: int, output: Path) -> None:
+    for ix in range(n_ops):
+        with shuffler.shuffle(f"Task-{task_ix}"), output.open("a") as file:
+            file.write(f"{task_ix} {ix}\n")
+
+    shuffler.decrement_pool_size()
+
+
+@pytest.mark.parametrize("ops_counts", ([1, 1], [2, 2], [1, 2, 1]))
+def test_exhaustive(ops_counts: list[int], tmp_path: Path) -> None:
+    expected_interleavings = all_interleavings(
+        *(
+            [(task_ix, op) for op in range(n_ops)]
+            for task_ix, n_ops in enumerate(ops_counts)
+        )
+    )
+    ctx = multiprocessing.get_context("fork")
+    output = tmp_path / "output"
+
+    interleavings = []
+    with ProcessShuffler(
+        pool_size=len(ops_counts), strategy=ExhaustiveStrategy()
+    ) as shuffler:
+        while not shuffler.strategy_completed():
+            output.write_text("")
+            processes = [
+                ctx.Process(target=task, args=(shuffler, task_ix, n_ops, output))
+                for task_ix, n_ops in enumerate(ops_counts)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+                assert process.exitcode == 0
+
+            lines = output.read_text().splitlines()
+            interleavings.append([tuple(map(int, line.split())) for line in lines])
+            sequence = shuffler.finish_sequence()
+            assert len(sequence) == sum(ops_counts)
+
+    assert sorted(interleavings) == sorted(expected_interleavings)
+
+
+def test_spawn(tmp_path: Path) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    output = tmp_path / "output"
+    output.write_text("")
+
+    with ProcessShuffler(pool_size=2, strategy=ExhaustiveStrategy()) as shuffler:
+        processes = [
+            ctx.Process(target=task, args=(shuffler, task_ix, 2, output))
+            for task_ix in range(2)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        assert len(shuffler.finish_sequence()) == 4
+        assert len(output.read_text().splitlines()) == 4
+
+    # Clients can't drive the exploration
+    client = pickle.loads(pickle.dumps(shuffler))
+    with pytest.raises(RuntimeError):
+        client.finish_sequence()
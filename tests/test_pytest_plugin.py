@@ -0,0 +1,192 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from shuffler.pytest_plugin import (
+    ExplorationFailed,
+    decode_replay,
+    encode_replay,
+    explore,
+    replays_test,
+    run_exploration,
+)
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.shufflers.threading import ThreadingShuffler
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+from shuffler.strategies.protocol import Strategy
+from shuffler.strategies.random import RandomStrategy
+from shuffler.util import n_interleavings
+
+
+def threading_shuffler(strategy: Strategy[str]) -> ThreadingShuffler:
+    return ThreadingShuffler(pool_size=3, strategy=strategy)
+
+
+def asyncio_shuffler(strategy: Strategy[str]) -> AsyncioShuffler:
+    return AsyncioShuffler(pool_size=2, strategy=strategy)
+
+
+def run_threads(shuffler: ThreadingShuffler, n_ops: int = 2) -> list[str]:
+    output = []
+
+    def task(task_id: str) -> None:
+        for _ in range(n_ops):
+            with shuffler.shuffle(task_id):
+                output.append(task_id)
+        shuffler.decrement_pool_size()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        for task_id in "ABC":
+            pool.submit(task, task_id)
+
+    return output
+
+
+async def increment(shuffler: AsyncioShuffler) -> None:
+    db = {"value": 0}
+
+    async def task(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            value = db["value"]
+        async with shuffler.shuffle(task_id):
+            db["value"] = value + 1
+        shuffler.decrement_pool_size()
+
+    await asyncio.gather(task("A"), task("B"))
+    assert db["value"] == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 4])
+def test_exhaustive(workers: int) -> None:
+    sequences = []
+
+    def body(shuffler: ThreadingShuffler) -> None:
+        sequences.append(run_threads(shuffler))
+
+    iterations = run_exploration(body, threading_shuffler, workers=workers)
+    assert iterations == n_interleavings(2, 2, 2)
+    if workers == 1:
+        assert len(set(map(tuple, sequences))) == iterations
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_budget(workers: int) -> None:
+    iterations = run_exploration(
+        run_threads,
+        threading_shuffler,
+        lambda: RandomStrategy(max_iterations=1000),
+        max_iterations=10,
+        workers=workers,
+    )
+    assert iterations == 10
+
+    iterations = run_exploration(
+        run_threads,
+        threading_shuffler,
+        lambda: RandomStrategy(max_iterations=5),
+        workers=workers,
+    )
+    assert iterations == 5
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failure_replay(workers: int) -> None:
+    with pytest.raises(ExplorationFailed) as exc_info:
+        run_exploration(increment, asyncio_shuffler, workers=workers)
+
+    message = str(exc_info.value)
+    assert "AssertionError" in message
+    seed = message.split("--shuffler-replay=")[1].split()[0]
+    sequence = decode_replay(seed)
+    assert sorted(sequence) == ["A", "A", "B", "B"]
+    assert sequence not in (["A", "A", "B", "B"], ["B", "B", "A", "A"])
+
+    with pytest.raises(ExplorationFailed, match="iteration 1 "):
+        run_exploration(increment, asyncio_shuffler, replay=seed)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failure_base_exception(workers: int) -> None:
+    def body(shuffler: ThreadingShuffler) -> None:
+        if run_threads(shuffler)[:2] == ["C", "C"]:
+            pytest.fail("C first")
+
+    with pytest.raises(ExplorationFailed, match="C first") as exc_info:
+        run_exploration(body, threading_shuffler, workers=workers)
+
+    seed = str(exc_info.value).split("--shuffler-replay=")[1].split()[0]
+    assert decode_replay(seed)[:2] == ["C", "C"]
+
+
+def test_skip_passes_through() -> None:
+    def body(shuffler: ThreadingShuffler) -> None:
+        run_threads(shuffler)
+        pytest.skip("not here")
+
+    with pytest.raises(pytest.skip.Exception, match="not here"):
+        run_exploration(body, threading_shuffler)
+
+
+def test_replay_divergence() -> None:
+    for sequence in (["A", "C", "B", "B"], ["A", "B"], ["A", "B", "A", "B", "A"]):
+        with pytest.raises(ExplorationFailed, match="diverged"):
+            run_exploration(
+                run_threads, threading_shuffler, replay=encode_replay(sequence)
+            )
+
+
+def test_replay_bound_to_test(monkeypatch: pytest.MonkeyPatch) -> None:
+    seed = encode_replay(["B", "A", "B", "A"], "tests/test_db.py::test_other")
+    assert replays_test(seed, "tests/test_db.py::test_other")
+    assert not replays_test(seed, "tests/test_db.py::test_increment")
+    assert replays_test(encode_replay(["A"]), "tests/test_db.py::test_increment")
+
+    # Seeds of other tests are ignored, the exploration runs as usual
+    monkeypatch.setattr(
+        "shuffler.pytest_plugin._option",
+        lambda name: seed if name == "shuffler_replay" else None,
+    )
+    calls = []
+
+    @explore(threading_shuffler, ExhaustiveStrategy)
+    def decorated(shuffler: ThreadingShuffler) -> None:
+        calls.append(run_threads(shuffler, n_ops=1))
+
+    decorated()
+    assert len(calls) == 6
+
+
+def test_decorator() -> None:
+    calls = []
+
+    @explore(threading_shuffler, ExhaustiveStrategy, max_iterations=7)
+    def decorated(shuffler: ThreadingShuffler, extra: int) -> None:
+        calls.append(extra)
+        run_threads(shuffler, n_ops=1)
+
+    decorated(extra=1)
+    assert calls == [1] * 6
+
+    @explore(asyncio_shuffler, timeout=10)
+    async def failing(shuffler: AsyncioShuffler) -> None:
+        await increment(shuffler)
+
+    with pytest.raises(ExplorationFailed):
+        failing()
+
+
+@explore(threading_shuffler, workers=2)
+def test_explored(shuffler: ThreadingShuffler) -> None:
+    output = run_threads(shuffler)
+    assert sorted(output) == ["A", "A", "B", "B", "C", "C"]
+
+
+@explore(asyncio_shuffler, lambda: RandomStrategy(max_iterations=20))
+async def test_explored_async(shuffler: AsyncioShuffler) -> None:
+    async def task(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            await asyncio.sleep(0)
+        shuffler.decrement_pool_size()
+
+    await asyncio.gather(task("A"), task("B"))
@@ -0,0 +1,72 @@
+import pytest
+
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.strategies import Interner, RandomWalkStrategy
+from shuffler.util import all_interleavings, n_interleavings
+
+
+def explore(
+    strategy: RandomWalkStrategy[str], ops_counts: dict[str, int]
+) -> list[list[str]]:
+    interner: Interner[str] = Interner()
+    sequences = []
+    while not strategy.is_completed():
+        remaining = dict(ops_counts)
+        pending = sum(interner.bit(task_id) for task_id in remaining)
+        while pending:
+            task_id = interner.ids[strategy.choose_next_mask(pending, interner)]
+            remaining[task_id] -= 1
+            if not remaining[task_id]:
+                pending ^= interner.bit(task_id)
+        sequences.append(strategy.finish_sequence())
+    return sequences
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_covers_small_spaces(seed: int) -> None:
+    strategy: RandomWalkStrategy[str] = RandomWalkStrategy(max_iterations=1000)
+    strategy.seed(seed)
+    ops_counts = {"A": 2, "B": 1, "C": 2}
+    sequences = explore(strategy, ops_counts)
+
+    expected = all_interleavings(
+        *([task_id] * n_ops for task_id, n_ops in ops_counts.items())
+    )
+    assert sorted(sequences) == sorted(expected)
+    assert strategy.estimated_total() == len(expected)
+    assert strategy.tree_size() > len(expected)
+
+
+def test_max_iterations() -> None:
+    strategy: RandomWalkStrategy[str] = RandomWalkStrategy(max_iterations=50)
+    ops_counts = {"A": 3, "B": 3, "C": 3}
+    sequences = explore(strategy, ops_counts)
+    assert len(sequences) == 50
+    assert len(set(map(tuple, sequences))) == 50
+    assert strategy.estimated_total() == 50
+
+    strategy.reset()
+    assert strategy.tree_size() == 1
+    assert len(explore(strategy, {"A": 1, "B": 1})) == n_interleavings(1, 1)
+
+
+def test_set_options() -> None:
+    strategy: RandomWalkStrategy[str] = RandomWalkStrategy()
+    sequences = []
+    while not strategy.is_completed():
+        first = strategy.choose_next({"A", "B"})
+        strategy.choose_next({"A", "B"} - {first})
+        sequences.append(strategy.finish_sequence())
+    assert sorted(sequences) == [["A", "B"], ["B", "A"]]
+
+
+async def test_asyncio() -> None:
+    shuffler = AsyncioShuffler(pool_size=0, strategy=RandomWalkStrategy())
+
+    async def task(task_id: str) -> None:
+        for _ in range(2):
+            async with shuffler.shuffle(task_id):
+                pass
+
+    assert await shuffler.explore(lambda: [task("A"), task("B")]) == 6
+    assert shuffler.stats.estimated_total == 6
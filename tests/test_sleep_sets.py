@@ -0,0 +1,196 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+import pytest
+
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.shufflers.threading import ThreadingShuffler
+from shuffler.strategies import Access, ExhaustiveStrategy, Interner, independent
+from shuffler.util import all_interleavings
+
+Program = dict[str, list[Access | None]]
+
+
+def explore(strategy: ExhaustiveStrategy[str], program: Program) -> list[list[str]]:
+    interner: Interner[str] = Interner()
+    sequences = []
+    while not strategy.is_completed():
+        positions = dict.fromkeys(program, 0)
+        pending = 0
+        for task_id, ops in program.items():
+            strategy.declare_access(task_id, ops[0])
+            pending |= interner.bit(task_id)
+
+        while pending:
+            task_id = interner.ids[strategy.choose_next_mask(pending, interner)]
+            positions[task_id] += 1
+            if positions[task_id] == len(program[task_id]):
+                pending ^= interner.bit(task_id)
+            else:
+                strategy.declare_access(task_id, program[task_id][positions[task_id]])
+        sequences.append(strategy.finish_sequence())
+    return sequences
+
+
+def trace(
+    program: Program, sequence: list[str]
+) -> frozenset[tuple[str, int, str, int]]:
+    """Orders of dependent ops, equal for sequences equivalent up to swaps"""
+    positions = dict.fromkeys(program, 0)
+    ops = []
+    for task_id in sequence:
+        ops.append((task_id, positions[task_id]))
+        positions[task_id] += 1
+
+    return frozenset(
+        (*first, *second)
+        for first, second in combinations(ops, 2)
+        if first[0] != second[0]
+        and not independent(program[first[0]][first[1]], program[second[0]][second[1]])
+    )
+
+
+@pytest.mark.parametrize(
+    "program",
+    (
+        {"A": [Access("x")], "B": [Access("y")]},
+        {"A": [Access("x"), Access("x")], "B": [Access("y"), Access("y")]},
+        {"A": [Access("x"), Access("y", write=True)], "B": [Access("x"), Access("y")]},
+        {
+            "A": [Access("x", write=True), None],
+            "B": [Access("y", write=True), Access("x")],
+            "C": [Access("z"), Access("y")],
+        },
+        {"A": [Access("x", write=True)] * 2, "B": [Access("x", write=True)] * 2},
+        {"A": [None, None], "B": [Access("y")] * 2, "C": [Access("z")]},
+    ),
+)
+def test_covers_all_traces(program: Program) -> None:
+    expected = all_interleavings(
+        *([task_id] * len(ops) for task_id, ops in program.items())
+    )
+    sequences = explore(ExhaustiveStrategy(), program)
+
+    assert len(set(map(tuple, sequences))) == len(sequences)
+    assert {trace(program, sequence) for sequence in sequences} == {
+        trace(program, sequence) for sequence in expected
+    }
+    assert len(sequences) <= len(expected)
+
+
+def test_reduction() -> None:
+    program: Program = {
+        "A": [Access("a"), Access("a"), Access("shared", write=True)],
+        "B": [Access("b"), Access("b"), Access("shared", write=True)],
+        "C": [Access("c"), Access("c")],
+    }
+    expected = all_interleavings(
+        *([task_id] * len(ops) for task_id, ops in program.items())
+    )
+    strategy: ExhaustiveStrategy[str] = ExhaustiveStrategy()
+    sequences = explore(strategy, program)
+    assert len(sequences) < len(expected) / 5
+    assert strategy.estimated_total() == len(sequences)
+
+    # Without declared accesses every op depends on every other one
+    undeclared: Program = {
+        task_id: [None for _ in ops] for task_id, ops in program.items()
+    }
+    assert len(explore(ExhaustiveStrategy(), undeclared)) == len(expected)
+
+
+def test_threading() -> None:
+    shuffler = ThreadingShuffler(pool_size=2, strategy=ExhaustiveStrategy())
+    state = {"x": 0, "y": 0, "total": 0}
+
+    def task(key: str) -> None:
+        with shuffler.shuffle(key, Access(key)):
+            value = state[key]
+        with shuffler.shuffle(key, Access(key, write=True)):
+            state[key] = value + 1
+        with shuffler.shuffle(key, Access("total", write=True)):
+            state["total"] += 1
+        shuffler.decrement_pool_size()
+
+    sequences = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        while not shuffler.strategy_completed():
+            for future in [executor.submit(task, "x"), executor.submit(task, "y")]:
+                future.result()
+            sequences.append(shuffler.finish_sequence())
+
+    # Of 20 interleavings, only the order of the writes of `total` matters
+    assert len(sequences) < 20
+    assert {sequence[-1] for sequence in sequences} == {"x", "y"}
+    assert state == {
+        "x": len(sequences),
+        "y": len(sequences),
+        "total": 2 * len(sequences),
+    }
+
+
+async def test_asyncio() -> None:
+    shuffler = AsyncioShuffler(pool_size=2, strategy=ExhaustiveStrategy())
+    state = {"x": 0, "y": 0}
+
+    async def task(task_id: str) -> None:
+        for key in ("x", "y"):
+            async with shuffler.shuffle(task_id, Access(key)):
+                value = state[key]
+            async with shuffler.shuffle(task_id, Access(key, write=task_id == "W")):
+                state[key] = value
+        shuffler.decrement_pool_size()
+
+    iterations = 0
+    while not shuffler.strategy_completed():
+        await asyncio.gather(task("R"), task("W"))
+        shuffler.finish_sequence()
+        iterations += 1
+
+    assert iterations < len(all_interleavings(["R"] * 4, ["W"] * 4))
+
+
+class FirstOption:
+    """Duck-typed strategy without `declare_access`, runs a single iteration"""
+
+    def __init__(self) -> None:
+        self.sequences: list[list[str]] = [[]]
+
+    def choose_next(self, options: set[str]) -> str:
+        self.sequences[-1].append(min(options))
+        return min(options)
+
+    def finish_sequence(self) -> list[str]:
+        self.sequences.append([])
+        return self.sequences[-2]
+
+    def is_completed(self) -> bool:
+        return len(self.sequences) > 1
+
+    def reset(self) -> None:
+        self.sequences = [[]]
+
+
+def test_undeclared_strategy_threading() -> None:
+    strategy = FirstOption()
+    shuffler = ThreadingShuffler(pool_size=0, strategy=strategy)  # type: ignore[arg-type]
+
+    def task(task_id: str) -> None:
+        with shuffler.shuffle(task_id, Access(task_id)):
+            pass
+
+    shuffler.run_tasks(lambda: task("A"), lambda: task("B"))
+    assert shuffler.finish_sequence() == ["A", "B"]
+
+
+async def test_undeclared_strategy_asyncio() -> None:
+    strategy = FirstOption()
+    shuffler = AsyncioShuffler(pool_size=0, strategy=strategy)  # type: ignore[arg-type]
+
+    async def task(task_id: str) -> None:
+        async with shuffler.shuffle(task_id, Access(task_id)):
+            pass
+
+    assert await shuffler.explore(lambda: [task("A"), task("B")]) == 1
+    assert strategy.sequences[0] == ["A", "B"]
@@ -6,7 +6,8 @@ from sqlalchemy import Column, Integer, MetaData, Table, select
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
-from shuffler.plugins.sqlalchemy import AlchemyPlugin
+from shuffler.plugins.sqlalchemy import AlchemyPlugin, Hook
+from shuffler.util import n_interleavings
 
 meta = MetaData()
 
@@ -116,3 +117,29 @@ async def test_deadlock(engine: AsyncEngine) -> None:
 
     else:
         pytest.fail("Expected deadlock")
+
+
+@pytest.mark.db
+@pytest.mark.parametrize(
+    ("hooks", "n_points"),
+    (
+        ([Hook.COMMIT], 1),
+        ([Hook.BEGIN, Hook.COMMIT], 2),
+        ([Hook.CHECKOUT, Hook.CHECKIN], 2),
+        ([Hook.EXECUTE, Hook.COMMIT], 2),
+        ([Hook.CHECKOUT, Hook.BEGIN, Hook.EXECUTE, Hook.COMMIT, Hook.CHECKIN], 5),
+    ),
+)
+async def test_hooks(engine: AsyncEngine, hooks: list[Hook], n_points: int) -> None:
+    plugin = AlchemyPlugin(engine=engine, hooks=hooks)
+
+    sequences = [
+        sequence
+        async for sequence in plugin.run(
+            lambda: get_value(engine),
+            lambda: get_value(engine),
+        )
+    ]
+
+    assert len(sequences) == n_interleavings(n_points, n_points)
+    assert all(sequence.count(1) == n_points for sequence in sequences)
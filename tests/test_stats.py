@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from shuffler.shufflers.asyncio import AsyncioShuffler
+from shuffler.stats import Stats, StatsCollector
+from shuffler.strategies.exhaustive import ExhaustiveStrategy
+from shuffler.strategies.random import RandomStrategy
+from shuffler.util import n_interleavings
+
+
+@pytest.mark.parametrize(
+    "ops_counts",
+    (
+        [1, 1],
+        [2, 2],
+        [1, 2, 3],
+    ),
+)
+async def test_exhaustive_stats(ops_counts: list[int]) -> None:
+    reports: list[Stats] = []
+    shuffler = AsyncioShuffler(
+        pool_size=len(ops_counts),
+        strategy=ExhaustiveStrategy(),
+        progress=reports.append,
+        progress_interval=0,
+    )
+
+    async def task(task_id: str, n_ops: int) -> None:
+        for _ in range(n_ops):
+            async with shuffler.shuffle(task_id):
+                await asyncio.sleep(0)
+        shuffler.decrement_pool_size()
+
+    assert shuffler.stats.estimated_total is None
+
+    while not shuffler.strategy_completed():
+        await asyncio.gather(
+            *(task(f"Task-{ix}", n_ops) for ix, n_ops in enumerate(ops_counts))
+        )
+        shuffler.finish_sequence()
+
+    total = n_interleavings(*ops_counts)
+    stats = shuffler.stats
+    assert stats.iterations == total
+    assert stats.steps == total * sum(ops_counts)
+    assert stats.estimated_total == total
+    assert stats.progress == 1.0
+    assert stats.tree_nodes > 0
+    assert stats.tree_memory > 0
+    assert stats.run_time > 0
+    assert stats.decision_time > 0
+    assert stats.elapsed >= stats.run_time
+
+    # With no interval, reports are made at every decision and iteration
+    assert len(reports) == stats.steps + total
+    assert [report.steps for report in reports] == sorted(
+        report.steps for report in reports
+    )
+    assert {report.iterations for report in reports} == set(range(total + 1))
+    assert all(report.estimated_total for report in reports if report.iterations)
+
+    shuffler.reset()
+    assert shuffler.stats.iterations == shuffler.stats.tree_nodes == 0
+
+
+async def test_random_stats() -> None:
+    shuffler = AsyncioShuffler(
+        pool_size=2,
+        strategy=RandomStrategy(max_iterations=10),
+    )
+
+    async def task(task_id: str) -> None:
+        async with shuffler.shuffle(task_id):
+            pass
+        shuffler.decrement_pool_size()
+
+    while not shuffler.strategy_completed():
+        await asyncio.gather(task("A"), task("B"))
+        shuffler.finish_sequence()
+        assert shuffler.stats.progress == shuffler.stats.iterations / 10
+
+    assert shuffler.stats.iterations == shuffler.stats.estimated_total == 10
+    assert shuffler.stats.tree_nodes == 0
+
+
+async def test_progress_within_iteration() -> None:
+    reports: list[Stats] = []
+    shuffler = AsyncioShuffler(
+        pool_size=1,
+        strategy=RandomStrategy(max_iterations=1),
+        progress=reports.append,
+        progress_interval=0.01,
+    )
+
+    async def task() -> None:
+        for _ in range(3):
+            async with shuffler.shuffle("A"):
+                await asyncio.sleep(0.02)
+
+    await shuffler.run_tasks(task())
+    # At least the decisions of the second and the third op are reported
+    assert len(reports) >= 2
+    assert {report.iterations for report in reports} == {0}
+    shuffler.finish_sequence()
+    assert reports[-1].iterations == 1
+
+
+class CountingStrategy:
+    """Duck-typed strategy without the optional methods of `Strategy`"""
+
+    def choose_next(self, options: set[str]) -> str:
+        return min(options)
+
+    def finish_sequence(self) -> list[str]:
+        return []
+
+    def is_completed(self) -> bool:
+        return False
+
+    def reset(self) -> None:
+        pass
+
+
+def test_duck_typed_strategy() -> None:
+    metrics: StatsCollector[str] = StatsCollector(
+        CountingStrategy()  # type: ignore[arg-type]
+    )
+    metrics.finish_sequence()
+    stats = metrics.stats
+    assert stats.iterations == 1
+    assert stats.estimated_total is None
+    assert stats.tree_nodes == stats.tree_memory == 0
@@ -1,8 +1,10 @@
+import time
 from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, TypeAlias
 
 import pytest
 
+from shuffler.shufflers.protocol import LivelockError
 from shuffler.shufflers.threading import ThreadingShuffler
 from shuffler.strategies.exhaustive import ExhaustiveStrategy
 from shuffler.util import all_interleavings
@@ -77,3 +79,123 @@ def test_exhaustive(ops_counts: list[int]) -> None:
 
     assert sorted(interleavings) == sorted(expected_interleavings)
     assert sorted(sequences) == sorted(expected_sequences)
+
+
+def test_livelock() -> None:
+    shuffler = ThreadingShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), max_wait_for=5.0, max_steps=10
+    )
+    state = {"started": False, "ready": False}
+
+    def spinner() -> None:
+        with shuffler.shuffle("A"):
+            state["started"] = True
+        # Never finishes unless B ran first
+        while not state["ready"]:
+            with shuffler.shuffle("A"):
+                pass
+        shuffler.decrement_pool_size()
+
+    def setter() -> None:
+        with shuffler.shuffle("B"):
+            state["ready"] = not state["started"]
+        shuffler.decrement_pool_size()
+
+    errors = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        state.update(started=False, ready=False)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(spinner), pool.submit(setter)]
+        errors.append(futures[0].exception())
+        sequence = shuffler.finish_sequence()
+        assert (errors[-1] is None) is (sequence == ["B", "A"])
+
+    assert time.monotonic() - started_at < 5.0
+    livelocks = [error for error in errors if error is not None]
+    assert len(livelocks) == len(errors) - 1 == 10
+    for error in livelocks:
+        assert isinstance(error, LivelockError)
+        assert "A" in error.tasks
+
+
+def test_stalled_task() -> None:
+    shuffler = ThreadingShuffler(
+        pool_size=2, strategy=ExhaustiveStrategy(), max_wait_for=0.01, max_stalls=5
+    )
+    state = {"stop": False}
+
+    def spinner() -> None:
+        with shuffler.shuffle("A"):
+            pass
+        # Neither reaches another scheduling point nor finishes by itself
+        while not state["stop"]:
+            time.sleep(0.001)
+        shuffler.decrement_pool_size()
+
+    def poller() -> None:
+        try:
+            while True:
+                with shuffler.shuffle("B"):
+                    pass
+        finally:
+            state["stop"] = True
+
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(spinner), pool.submit(poller)]
+    shuffler.finish_sequence()
+
+    assert time.monotonic() - started_at < 1.0
+    assert futures[0].exception() is None
+    error = futures[1].exception()
+    assert isinstance(error, LivelockError)
+    assert error.tasks == ["B"]
+
+
+def test_run_tasks() -> None:
+    # Any step waiting for a finished task would blow the time limit below
+    shuffler = ThreadingShuffler(
+        pool_size=0, strategy=ExhaustiveStrategy(), max_wait_for=5.0
+    )
+
+    def task(task_id: str, n_ops: int) -> Callable[[], str]:
+        def run() -> str:
+            for _ in range(n_ops):
+                with shuffler.shuffle(task_id):
+                    pass
+            if task_id == "C":
+                raise ValueError(task_id)
+            return task_id
+
+        return run
+
+    def parent() -> str:
+        with shuffler.shuffle("A"):
+            # Waited for by `run_tasks`
+            shuffler.spawn(task("D", 1))
+        with shuffler.shuffle("A"):
+            pass
+        return "A"
+
+    sequences = []
+    started_at = time.monotonic()
+    while not shuffler.strategy_completed():
+        results = shuffler.run_tasks(
+            parent, task("B", 1), task("C", 1), task("E", 0), return_exceptions=True
+        )
+        assert results[:2] == ["A", "B"]
+        assert isinstance(results[2], ValueError)
+        assert results[3] == "E"
+        sequences.append(shuffler.finish_sequence())
+
+    assert time.monotonic() - started_at < 5.0
+    # D only exists after the first op of A
+    expected = [
+        sequence
+        for sequence in all_interleavings(["A", "A"], ["B"], ["C"], ["D"])
+        if sequence.index("A") < sequence.index("D")
+    ]
+    assert sorted(sequences) == sorted(expected)
+    with pytest.raises(ValueError, match="C"):
+        shuffler.run_tasks(task("C", 0))